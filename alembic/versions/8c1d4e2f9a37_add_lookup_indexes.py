@@ -0,0 +1,49 @@
+"""add lookup indexes
+
+Revision ID: 8c1d4e2f9a37
+Revises: 3ff28a236070
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c1d4e2f9a37"
+down_revision: Union[str, Sequence[str], None] = "3ff28a236070"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOREIGN_KEY_INDEXES = [
+    ("ix_books_author_id", "books", "author_id"),
+    ("ix_books_genre_id", "books", "genre_id"),
+    ("ix_orders_author_id", "orders", "author_id"),
+    ("ix_books_orders_order_id", "books_orders", "order_id"),
+    ("ix_book_tags_tag_id", "book_tags", "tag_id"),
+]
+EXPRESSION_INDEXES = [
+    ("ix_authors_email_lower", "authors", "lower(email)"),
+    ("ix_authors_username_lower", "authors", "lower(username)"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build, but can't run inside a transaction.
+    with op.get_context().autocommit_block():
+        for name, table, column in FOREIGN_KEY_INDEXES:
+            op.create_index(op.f(name), table, [column], unique=False, postgresql_concurrently=True)
+        for name, table, expression in EXPRESSION_INDEXES:
+            op.create_index(name, table, [sa.text(expression)], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(EXPRESSION_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        for name, table, _ in reversed(FOREIGN_KEY_INDEXES):
+            op.drop_index(op.f(name), table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""add book relations
+
+Revision ID: a83e5d0c7f14
+Revises: f29c7a5e1b63
+Create Date: 2026-10-19 17:48:12.930451
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a83e5d0c7f14"
+down_revision: Union[str, Sequence[str], None] = "f29c7a5e1b63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Backfill with `python -m scripts.rebuild_book_relations` once this has run.
+    op.create_table(
+        "book_relations",
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("related_book_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["related_book_id"], ["books.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("book_id", "related_book_id"),
+    )
+    op.create_index("ix_book_relations_related_book_id", "book_relations", ["related_book_id"], unique=False)
+    op.create_index(
+        "ix_book_relations_book_id_score",
+        "book_relations",
+        ["book_id", sa.text("score DESC"), "related_book_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_book_relations_book_id_score", table_name="book_relations")
+    op.drop_index("ix_book_relations_related_book_id", table_name="book_relations")
+    op.drop_table("book_relations")
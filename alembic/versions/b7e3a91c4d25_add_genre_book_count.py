@@ -0,0 +1,43 @@
+"""add genre book count
+
+Revision ID: b7e3a91c4d25
+Revises: 8c1d4e2f9a37
+Create Date: 2026-10-19 15:40:08.512937
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e3a91c4d25"
+down_revision: Union[str, Sequence[str], None] = "8c1d4e2f9a37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("genres", sa.Column("book_count", sa.Integer(), server_default="0", nullable=False))
+    op.execute(
+        "UPDATE genres SET book_count = counts.n "
+        "FROM (SELECT genre_id, count(*) AS n FROM books GROUP BY genre_id) AS counts "
+        "WHERE genres.id = counts.genre_id"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_books_genre_id_date_published",
+            "books",
+            ["genre_id", "date_published", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_books_genre_id_date_published", table_name="books", postgresql_concurrently=True)
+    op.drop_column("genres", "book_count")
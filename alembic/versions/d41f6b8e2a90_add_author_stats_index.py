@@ -0,0 +1,35 @@
+"""add author stats index
+
+Revision ID: d41f6b8e2a90
+Revises: b7e3a91c4d25
+Create Date: 2026-10-19 16:22:51.604318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d41f6b8e2a90"
+down_revision: Union[str, Sequence[str], None] = "b7e3a91c4d25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_books_author_id_date_published",
+            "books",
+            ["author_id", "date_published"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_books_author_id_date_published", table_name="books", postgresql_concurrently=True)
@@ -0,0 +1,71 @@
+"""add author counters
+
+Revision ID: e6c3b9d2f418
+Revises: a83e5d0c7f14
+Create Date: 2026-10-19 19:05:37.218640
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e6c3b9d2f418"
+down_revision: Union[str, Sequence[str], None] = "a83e5d0c7f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("authors", sa.Column("book_count", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("authors", sa.Column("order_count", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("authors", sa.Column("last_published", sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE authors SET book_count = counts.n, last_published = counts.latest "
+        "FROM (SELECT author_id, count(*) AS n, max(date_published) AS latest FROM books GROUP BY author_id) AS counts "
+        "WHERE authors.id = counts.author_id"
+    )
+    op.execute(
+        "UPDATE authors SET order_count = counts.n "
+        "FROM (SELECT author_id, count(*) AS n FROM orders GROUP BY author_id) AS counts "
+        "WHERE authors.id = counts.author_id"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_authors_book_count",
+            "authors",
+            [sa.text("book_count DESC"), "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_authors_order_count",
+            "authors",
+            [sa.text("order_count DESC"), "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_authors_last_published",
+            "authors",
+            [sa.text("last_published DESC NULLS LAST"), "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # ix_books_author_id_date_published leads with author_id and serves the same lookups.
+        op.drop_index("ix_books_author_id", table_name="books", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index("ix_books_author_id", "books", ["author_id"], unique=False, postgresql_concurrently=True)
+        op.drop_index("ix_authors_last_published", table_name="authors", postgresql_concurrently=True)
+        op.drop_index("ix_authors_order_count", table_name="authors", postgresql_concurrently=True)
+        op.drop_index("ix_authors_book_count", table_name="authors", postgresql_concurrently=True)
+    op.drop_column("authors", "last_published")
+    op.drop_column("authors", "order_count")
+    op.drop_column("authors", "book_count")
@@ -0,0 +1,43 @@
+"""add tag usage count
+
+Revision ID: f29c7a5e1b63
+Revises: d41f6b8e2a90
+Create Date: 2026-10-19 17:05:37.219846
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f29c7a5e1b63"
+down_revision: Union[str, Sequence[str], None] = "d41f6b8e2a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("tags", sa.Column("usage_count", sa.Integer(), server_default="0", nullable=False))
+    op.execute(
+        "UPDATE tags SET usage_count = counts.n "
+        "FROM (SELECT tag_id, count(*) AS n FROM book_tags GROUP BY tag_id) AS counts "
+        "WHERE tags.id = counts.tag_id"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tags_usage_count",
+            "tags",
+            [sa.text("usage_count DESC"), "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tags_usage_count", table_name="tags", postgresql_concurrently=True)
+    op.drop_column("tags", "usage_count")
@@ -0,0 +1,82 @@
+"""Login lookup latency with and without the lower(email) expression index.
+
+Usage:
+    python -m benchmarks.author_login --authors 1000000 --lookups 200
+
+Seeds `--authors` synthetic authors (idempotent, one INSERT ... SELECT generate_series) into the configured
+database, then times the case-insensitive email lookup used by login_author_for_access_token. The "before"
+run drops the index inside a transaction that is rolled back afterwards, so the schema is left untouched.
+Run it against a disposable database: the seeded rows are kept for later runs.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from src.authors.models import Author
+from src.authors.security import hash_password
+from src.config import settings
+
+SEED_AUTHORS = text(
+    "INSERT INTO authors (email, username, password_hash, is_active, is_superuser) "
+    "SELECT 'bench-author-' || i || '@example.com', 'Bench_Author_' || i, :password_hash, true, false "
+    "FROM generate_series(1, :count) AS i "
+    "ON CONFLICT DO NOTHING"
+)
+
+
+def login_stmt(email: str):
+    # Same shape as the lookup in login_author_for_access_token.
+    return select(Author).where(func.lower(Author.email) == email.lower())
+
+
+async def measure(conn: AsyncConnection, emails: list[str]) -> tuple[list[float], str]:
+    compiled = login_stmt(emails[0]).compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    plan_rows = (await conn.exec_driver_sql(f"EXPLAIN {compiled}")).scalars().all()
+    timings = []
+    for email in emails:
+        started = time.perf_counter()
+        (await conn.execute(login_stmt(email))).first()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, plan_rows[0]
+
+
+def report(title: str, timings: list[float], plan: str) -> None:
+    quantiles = statistics.quantiles(timings, n=100)
+    print(f"\n{title}\n  plan: {plan.strip()}")
+    print(f"  p50 {quantiles[49]:.2f} ms   p95 {quantiles[94]:.2f} ms   max {max(timings):.2f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--authors", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with engine.begin() as conn:
+        existing = await conn.scalar(select(func.count()).select_from(Author))
+        if existing < args.authors:
+            print(f"Seeding {args.authors} authors...")
+            await conn.execute(SEED_AUTHORS, {"password_hash": hash_password("benchmark"), "count": args.authors})
+            await conn.execute(text("ANALYZE authors"))
+
+    emails = [f"BENCH-AUTHOR-{random.randint(1, args.authors)}@example.com" for _ in range(args.lookups)]
+
+    async with engine.connect() as conn:
+        async with conn.begin() as transaction:
+            await conn.execute(text("DROP INDEX IF EXISTS ix_authors_email_lower"))
+            report("before (no lower(email) index)", *await measure(conn, emails))
+            await transaction.rollback()
+        async with conn.begin():
+            report("after (ix_authors_email_lower)", *await measure(conn, emails))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Time `import src.main` in fresh interpreters and fail when it exceeds a budget.
+
+Usage:
+    python -m benchmarks.import_time [--runs 5] [--budget 2.0] [--top 15]
+
+Every run imports the app in a new `python -X importtime` process, so nothing is cached between runs; the
+median of the cumulative src.main time is compared with `--budget` (seconds) and the exit status is 1 when it
+is over, so CI can run this after the tests. The modules with the largest self time in the median run are
+listed to show where a regression came from (an import-time bcrypt hash shows up as the importing module's
+self time). The environment is passed through, so DB_* and the other settings must be set as for the app.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every module imported by a fresh `import <module>`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        times = import_times(args.module)
+        total = next(cumulative for name, _, cumulative in times if name == args.module)
+        runs.append((total, times))
+    runs.sort(key=lambda run: run[0])
+    totals = [total / 1_000_000 for total, _ in runs]
+    median_total, median_times = runs[len(runs) // 2]
+
+    print(f"import {args.module}: median {statistics.median(totals):.3f}s, min {totals[0]:.3f}s, max {totals[-1]:.3f}s")
+    print(f"\n{'self ms':>9}{'cumul ms':>10}  module")
+    for name, self_us, cumulative_us in sorted(median_times, key=lambda item: -item[1])[: args.top]:
+        print(f"{self_us / 1000:>9.1f}{cumulative_us / 1000:>10.1f}  {name}")
+
+    if median_total / 1_000_000 > args.budget:
+        print(f"\nOver budget: {median_total / 1_000_000:.3f}s > {args.budget:.3f}s")
+        return 1
+    print(f"\nWithin budget of {args.budget:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Mixed read/write load test with per-route throughput and latency percentiles.
+
+Usage:
+    python -m benchmarks.load_test --scale 10000 --duration 60 --concurrency 64 --save results.json
+    python -m benchmarks.load_test --scale 10000 --duration 60 --concurrency 64 \\
+        --baseline benchmarks/baseline.json --max-regression 0.15
+
+Seeds the configured database (DB_*) with scripts.seed up to `--scale` authors with five books each (rows are
+only added, so later runs reuse them), boots src.main:app under uvicorn on a free port, and drives it with
+`--concurrency` clients for `--duration` seconds after a warm-up. Requests follow a fixed scenario mix with
+Zipf-distributed book popularity; the seed for the random generator is fixed so runs are comparable.
+
+With --baseline, every route present in both runs is compared: p95 or p99 latency growing, or throughput
+dropping, by more than --max-regression (a fraction) is reported as a regression and the exit status is 1.
+Pass --url to target an already running server instead of booting one.
+"""
+
+import argparse
+import asyncio
+import bisect
+import functools
+import itertools
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from scripts.seed import SEED_PASSWORD, Shape, seed_database
+from src.authors.models import Author
+from src.books.models import Book, Genre
+from src.config import settings
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, duration: float) -> dict:
+        latencies = sorted(self.latencies)
+        if len(latencies) >= 2:
+            quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            p50, p95, p99 = quantiles[49], quantiles[94], quantiles[98]
+        else:
+            p50 = p95 = p99 = latencies[0] if latencies else 0.0
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "throughput": len(latencies) / duration,
+            "p50_ms": p50 * 1000,
+            "p95_ms": p95 * 1000,
+            "p99_ms": p99 * 1000,
+        }
+
+
+class ZipfSampler:
+    """Picks from `values` with probability proportional to 1 / rank ** s: a few hot items, a long tail."""
+
+    def __init__(self, values: list[int], s: float) -> None:
+        self.values = values
+        self.cumulative = list(itertools.accumulate(1 / rank**s for rank in range(1, len(values) + 1)))
+
+    def sample(self, rng: random.Random) -> int:
+        return self.values[bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])]
+
+
+@dataclass
+class Dataset:
+    book_ids: list[int]
+    author_ids: list[int]
+    genre_ids: list[int]
+    emails: list[str]
+
+
+# (route label, weight, request factory) - the label is the route template so results aggregate per route.
+Scenario = tuple[str, int, Callable[[Dataset, Callable[[], int], random.Random], tuple[str, str, dict]]]
+
+SCENARIOS: list[Scenario] = [
+    ("GET /books/{book_id}/", 40, lambda data, book, rng: ("GET", f"/books/{book()}/", {})),
+    ("GET /genres/", 10, lambda data, book, rng: ("GET", "/genres/", {})),
+    ("GET /tags/", 10, lambda data, book, rng: ("GET", "/tags/", {})),
+    ("GET /authors/{author_id}/", 8, lambda data, book, rng: ("GET", f"/authors/{rng.choice(data.author_ids)}/", {})),
+    (
+        "GET /genres/genres/{genre_id}/with_books/",
+        3,
+        lambda data, book, rng: ("GET", f"/genres/genres/{rng.choice(data.genre_ids)}/with_books/", {}),
+    ),
+    ("GET /books/", 1, lambda data, book, rng: ("GET", "/books/", {})),
+    ("GET /orders/", 1, lambda data, book, rng: ("GET", "/orders/", {})),
+    (
+        "POST /orders/",
+        10,
+        lambda data, book, rng: (
+            "POST",
+            "/orders/",
+            {
+                "json": {
+                    "author_id": rng.choice(data.author_ids),
+                    "books": [{"book_id": book_id, "quantity": rng.randint(1, 3)} for book_id in {book(), book()}],
+                }
+            },
+        ),
+    ),
+    (
+        "POST /authors/login/",
+        3,
+        lambda data, book, rng: (
+            "POST",
+            "/authors/login/",
+            {"data": {"username": rng.choice(data.emails), "password": SEED_PASSWORD}},
+        ),
+    ),
+]
+
+
+async def seed(scale: int) -> Dataset:
+    engine = create_async_engine(settings.DATABASE_URL)
+    seeded = Author.email.like("author-%@example.com")
+    async with engine.connect() as conn:
+        existing = await conn.scalar(select(func.count()).where(seeded))
+    if existing < scale:
+        missing = scale - existing
+        print(f"Seeding {missing} authors, {missing * 5} books...")
+        shape = Shape(genres=50, tags=500, authors=missing, books=missing * 5, orders=missing)
+        await asyncio.to_thread(seed_database, shape)
+    async with engine.connect() as conn:
+        authors = (await conn.execute(select(Author.id, Author.email).where(seeded).limit(scale))).all()
+        book_ids = list((await conn.scalars(select(Book.id).order_by(Book.id))).all())
+        genre_ids = list((await conn.scalars(select(Genre.id))).all())
+    await engine.dispose()
+    return Dataset(book_ids, [row.id for row in authors], genre_ids, [row.email for row in authors])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"server at {url} did not become ready in {timeout}s")
+            await asyncio.sleep(0.2)
+
+
+async def run_load(url: str, data: Dataset, concurrency: int, warmup: float, duration: float, seed: int) -> dict:
+    stats: dict[str, RouteStats] = {label: RouteStats() for label, _, _ in SCENARIOS}
+    weights = [weight for _, weight, _ in SCENARIOS]
+    books = ZipfSampler(data.book_ids, 1.1)
+    started = time.monotonic()
+    measure_from = started + warmup
+    end = measure_from + duration
+
+    async def client_loop(client: httpx.AsyncClient, worker: int) -> None:
+        rng = random.Random(seed + worker)
+        book = functools.partial(books.sample, rng)
+        while (now := time.monotonic()) < end:
+            label, _, make_request = rng.choices(SCENARIOS, weights)[0]
+            method, path, kwargs = make_request(data, book, rng)
+            request_started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            elapsed = time.perf_counter() - request_started
+            if now >= measure_from:
+                stats[label].latencies.append(elapsed)
+                stats[label].errors += failed
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(client_loop(client, worker) for worker in range(concurrency)))
+    return {label: route.summary(duration) for label, route in stats.items() if route.latencies}
+
+
+def print_report(routes: dict) -> None:
+    print(f"\n{'route':<44}{'reqs':>8}{'err':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label, route in routes.items():
+        print(
+            f"{label:<44}{route['requests']:>8}{route['errors']:>6}{route['throughput']:>9.1f}"
+            f"{route['p50_ms']:>9.1f}{route['p95_ms']:>9.1f}{route['p99_ms']:>9.1f}"
+        )
+
+
+def compare(routes: dict, baseline: dict, max_regression: float) -> list[str]:
+    regressions = []
+    for label, base in baseline.items():
+        current = routes.get(label)
+        if current is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if current[metric] > base[metric] * (1 + max_regression):
+                regressions.append(f"{label}: {metric} {base[metric]:.1f} -> {current[metric]:.1f}")
+        if current["throughput"] < base["throughput"] * (1 - max_regression):
+            regressions.append(f"{label}: throughput {base['throughput']:.1f} -> {current['throughput']:.1f} req/s")
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10_000, help="authors to seed; 5 books per author")
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="benchmark a running server instead of booting one")
+    parser.add_argument("--save", help="write the results to this JSON file (e.g. to store a new baseline)")
+    parser.add_argument("--baseline", help="compare against results saved with --save")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args()
+
+    data = await seed(args.scale)
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port)]
+            + ["--workers", str(args.workers), "--no-access-log", "--log-level", "warning"],
+            env=os.environ.copy(),
+        )
+    try:
+        await wait_until_ready(url)
+        routes = await run_load(url, data, args.concurrency, args.warmup, args.duration, args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_report(routes)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"args": vars(args), "routes": routes}, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(routes, json.load(file)["routes"], args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.max_regression:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions over {args.max_regression:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
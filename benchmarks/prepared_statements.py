@@ -0,0 +1,124 @@
+"""Per-query cost of the hot statements, rebuilt vs pre-built and with/without server-side prepares.
+
+Usage:
+    python -m benchmarks.prepared_statements --iterations 5000 --book-id 1 --author-id 1
+
+Reports, per variant, the client CPU time (statement construction, SQLAlchemy compilation/cache lookup,
+psycopg), the wall time, and - when the pg_stat_statements extension is installed - the mean server-side
+planning and execution time of the statement.
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload, selectinload
+
+from src.authors import crud as authors_crud
+from src.authors.models import Author
+from src.books import crud as books_crud
+from src.books.models import Book, Genre, Tag
+from src.config import settings
+
+PG_STAT_QUERY = text(
+    "SELECT coalesce(sum(calls), 0), coalesce(sum(total_plan_time), 0), coalesce(sum(total_exec_time), 0) "
+    "FROM pg_stat_statements WHERE query LIKE :pattern"
+)
+
+
+def rebuilt_queries(book_id: int, author_id: int) -> dict[str, Callable]:
+    return {
+        "get_book": lambda: (
+            select(Book)
+            .where(Book.id == book_id)
+            .options(joinedload(Book.genre), joinedload(Book.author), selectinload(Book.tags)),
+            {},
+        ),
+        "get_author": lambda: (select(Author).where(Author.id == author_id), {}),
+        "get_genres": lambda: (select(Genre).order_by(Genre.name), {}),
+        "get_all_tags": lambda: (select(Tag).order_by(Tag.name), {}),
+    }
+
+
+def prebuilt_queries(book_id: int, author_id: int) -> dict[str, Callable]:
+    return {
+        "get_book": lambda: (books_crud.book_with_relations_stmt(book_id), {}),
+        "get_author": lambda: (authors_crud.AUTHOR_BY_ID_STMT, {"author_id": author_id}),
+        "get_genres": lambda: (books_crud.GENRES_STMT, {}),
+        "get_all_tags": lambda: (books_crud.TAGS_STMT, {}),
+    }
+
+
+async def server_stats(engine: AsyncEngine, table: str) -> tuple[int, float, float] | None:
+    try:
+        async with engine.connect() as conn:
+            row = (await conn.execute(PG_STAT_QUERY, {"pattern": f"%FROM {table}%"})).one()
+    except Exception:  # extension missing or not preloaded
+        return None
+    return int(row[0]), float(row[1]), float(row[2])
+
+
+async def run_variant(prepare_threshold: int | None, queries: dict[str, Callable], iterations: int) -> dict:
+    engine = create_async_engine(
+        settings.DATABASE_URL, pool_size=1, connect_args={"prepare_threshold": prepare_threshold}
+    )
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    tables = {"get_book": "books", "get_author": "authors", "get_genres": "genres", "get_all_tags": "tags"}
+    results = {}
+    async with session_factory() as session:
+        for name, build in queries.items():
+            # Warm up the compiled cache and let psycopg reach the prepare threshold.
+            for _ in range(10):
+                stmt, params = build()
+                (await session.execute(stmt, params)).scalars().all()
+                session.expunge_all()
+            before = await server_stats(engine, tables[name])
+            cpu, wall = time.process_time(), time.perf_counter()
+            for _ in range(iterations):
+                stmt, params = build()
+                (await session.execute(stmt, params)).scalars().all()
+                session.expunge_all()
+            cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+            after = await server_stats(engine, tables[name])
+            result = {"cpu_us": cpu / iterations * 1e6, "wall_us": wall / iterations * 1e6}
+            if before and after and after[0] > before[0]:
+                calls = after[0] - before[0]
+                result["plan_us"] = (after[1] - before[1]) / calls * 1e3
+                result["exec_us"] = (after[2] - before[2]) / calls * 1e3
+            results[name] = result
+    await engine.dispose()
+    return results
+
+
+def print_table(title: str, results: dict) -> None:
+    print(f"\n{title}")
+    print(f"{'query':<14}{'client cpu us':>15}{'wall us':>10}{'pg plan us':>12}{'pg exec us':>12}")
+    for name, r in results.items():
+        plan = f"{r['plan_us']:.1f}" if "plan_us" in r else "n/a"
+        execute = f"{r['exec_us']:.1f}" if "exec_us" in r else "n/a"
+        print(f"{name:<14}{r['cpu_us']:>15.1f}{r['wall_us']:>10.1f}{plan:>12}{execute:>12}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--book-id", type=int, default=1)
+    parser.add_argument("--author-id", type=int, default=1)
+    args = parser.parse_args()
+
+    threshold = settings.DB_PREPARE_THRESHOLD
+    variants = [
+        ("rebuilt statements, no server-side prepare", None, rebuilt_queries),
+        ("pre-built statements, no server-side prepare", None, prebuilt_queries),
+        (f"pre-built statements, prepare_threshold={threshold}", threshold, prebuilt_queries),
+    ]
+    for title, prepare_threshold, factory in variants:
+        results = await run_variant(prepare_threshold, factory(args.book_id, args.author_id), args.iterations)
+        print_table(title, results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""Response serialization cost for large list payloads, FastAPI's default path vs the fast paths.
+
+Usage:
+    python -m benchmarks.serialization --orders 2000 --books 5000
+
+Builds ORM-like objects in memory (no database needed) shaped like the rows behind GET /orders/ and
+GET /books/{id}/, then times:
+  * fastapi + json:    response_model validation, dump to dicts, stdlib json (FastAPI's default)
+  * fastapi + orjson:  the same, rendered by ORJSONResponse (the app's default response class)
+  * model_response:    one pydantic-core pass from ORM objects to JSON bytes (src.responses)
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+from pydantic import TypeAdapter
+
+from src.books.schemas import BookWithTags
+from src.media.images import variant_urls
+from src.orders.schemas import Order
+
+
+def make_author(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=i, username=f"author{i}", image_file=None, image_path="/static/profile_pics/default.jpg", image_variants={}
+    )
+
+
+def make_book(i: int, tags: int = 5) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=i,
+        title=f"Book {i}",
+        rating=i % 6,
+        date_published=datetime(2020, 1, 1),
+        image_file=f"{i:064x}.jpg",
+        image_path=f"/media/book_pics/{i:064x}.jpg",
+        image_variants=variant_urls("/media/book_pics", f"{i:064x}.jpg"),
+        genre=SimpleNamespace(id=i % 20, name=f"Genre {i % 20}"),
+        author=make_author(i % 500),
+        tags=[SimpleNamespace(id=t, name=f"tag{t}") for t in range(tags)],
+    )
+
+
+def make_order(i: int, books: int = 8) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=i,
+        author=make_author(i % 500),
+        ordered_at=datetime(2024, 1, 1),
+        books=[SimpleNamespace(id=i * 100 + b, book=make_book(b), quantity=1 + b % 3) for b in range(books)],
+    )
+
+
+def fastapi_json(adapter: TypeAdapter, content) -> bytes:
+    value = adapter.validate_python(content, from_attributes=True)
+    return json.dumps(adapter.dump_python(value, mode="json"), separators=(",", ":")).encode()
+
+
+def fastapi_orjson(adapter: TypeAdapter, content) -> bytes:
+    value = adapter.validate_python(content, from_attributes=True)
+    return orjson.dumps(adapter.dump_python(value, mode="json"))
+
+
+def model_response_body(adapter: TypeAdapter, content) -> bytes:
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def bench(title: str, adapter: TypeAdapter, content, repeat: int) -> None:
+    print(f"\n{title}")
+    for name, func in [
+        ("fastapi + json", fastapi_json),
+        ("fastapi + orjson", fastapi_orjson),
+        ("model_response", model_response_body),
+    ]:
+        body = func(adapter, content)
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(adapter, content)
+            best = min(best, time.perf_counter() - started)
+        print(f"  {name:<18}{best * 1000:>9.2f} ms  {len(body) / 1024:>9.0f} KiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bench(
+        f"{args.orders} x schemas.Order",
+        TypeAdapter(list[Order]),
+        [make_order(i) for i in range(args.orders)],
+        args.repeat,
+    )
+    bench(
+        f"{args.books} x schemas.BookWithTags",
+        TypeAdapter(list[BookWithTags]),
+        [make_book(i) for i in range(args.books)],
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Run every CRUD query against a seeded database and flag plans that need schema support.
+
+Usage:
+    python -m scripts.index_advisor [--min-rows 10000] [--loops 1000]
+
+Each CRUD function in src/books/crud.py, src/authors/crud.py and src/orders/crud.py is called once with ids
+taken from the database, inside a transaction that is rolled back at the end (writes included). Every SQL
+statement they issue is captured; once they have all run, reads are re-run under EXPLAIN (ANALYZE, BUFFERS)
+and writes only planned with EXPLAIN, since re-running them would hit the rows the scenarios already wrote
+or deleted. Statements the database can no longer plan are reported as not explainable. The report flags
+sequential scans over large tables, sorts that spill to disk and nested loops with many inner iterations
+(estimated counts for writes), and prints a candidate index for each finding. Point DB_* at a database
+seeded to production scale.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+
+from src.authors import crud as authors_crud
+from src.authors.models import Author, Profile
+from src.authors.schemas import AuthorCreate, AuthorUpdate, ProfileCreate, ProfileUpdate
+from src.authors.security import create_access_token
+from src.books import crud as books_crud
+from src.books.models import Book, Genre, Tag
+from src.books.schemas import BookCreate, BookUpdate, GenreCreate, GenreUpdate, TagCreate, TagUpdate
+from src.config import settings
+from src.orders import crud as orders_crud
+from src.orders.models import Order
+from src.orders.schemas import OrderBookIn, OrderCreate
+
+WRITES = ("INSERT", "UPDATE", "DELETE")
+FILTER_COLUMN = re.compile(r"(lower\()?\(*(\w+)\)*(?:::\w+)?\)?\s*(?:=|<>|<=|>=|<|>|~~\*?|IS)")
+
+
+@dataclass
+class Finding:
+    kind: str
+    detail: str
+    suggestion: str | None = None
+
+
+@dataclass
+class CapturedQuery:
+    function: str
+    statement: str
+    parameters: object
+    findings: list[Finding] = field(default_factory=list)
+    error: str | None = None
+
+
+def build_scenarios(ids: SimpleNamespace) -> dict[str, Callable[[AsyncSession], Awaitable]]:
+    suffix = uuid.uuid4().hex[:8]
+    token = create_access_token({"sub": str(ids.author)})
+    return {
+        "books.get_genres": lambda db: books_crud.crud_genre.get_genres(db),
+        "books.get_genre": lambda db: books_crud.crud_genre.get_genre(db, ids.genre),
+        "books.get_genre_with_books": lambda db: books_crud.crud_genre.get_genre_with_books(
+            db, ids.genre, limit=20, offset=0, sort="-date_published"
+        ),
+        "books.create_genre": lambda db: books_crud.crud_genre.create_genre(db, GenreCreate(name=f"adv-{suffix}")),
+        "books.update_genre": lambda db: books_crud.crud_genre.update_genre(
+            db, GenreUpdate(name=f"adv-g-{suffix}"), ids.genre
+        ),
+        "books.get_books": lambda db: books_crud.crud_book.get_books(db),
+        "books.get_book": lambda db: books_crud.crud_book.get_book(db, ids.book),
+        "books.get_related_books": lambda db: books_crud.crud_book.get_related_books(db, ids.book, 10),
+        "books.create_book": lambda db: books_crud.crud_book.create_book(
+            db,
+            BookCreate(
+                title=f"adv-{suffix}",
+                rating=3,
+                date_published=datetime.now() - timedelta(days=1),
+                genre_id=ids.genre,
+                author_id=ids.author,
+            ),
+        ),
+        "books.update_book": lambda db: books_crud.crud_book.update_book(
+            db, ids.book, BookUpdate(title=f"adv-b-{suffix}"), partial=True
+        ),
+        "books.attach_tag_to_book": lambda db: books_crud.crud_book.attach_tag_to_book(db, ids.book, ids.tag),
+        "books.detach_tag_from_book": lambda db: books_crud.crud_book.detach_tag_from_book(db, ids.book, ids.tag),
+        "books.get_all_tags": lambda db: books_crud.crud_tag.get_all_tags(db),
+        "books.get_popular_tags": lambda db: books_crud.crud_tag.get_popular_tags(db, 20),
+        "books.get_tag_by_id": lambda db: books_crud.crud_tag.get_tag_by_id(db, ids.tag),
+        "books.create_tag": lambda db: books_crud.crud_tag.create_tag(db, TagCreate(name=f"adv-{suffix}")),
+        "books.update_tag": lambda db: books_crud.crud_tag.update_tag(db, ids.tag, TagUpdate(name=f"adv-t-{suffix}")),
+        "authors.create_author": lambda db: authors_crud.create_author(
+            AuthorCreate(username=f"adv-{suffix}", email=f"adv-{suffix}@example.com", password="advisor-password"),
+            db,
+        ),
+        "authors.get_authors": lambda db: authors_crud.get_authors(db, limit=20, offset=0),
+        "authors.get_authors_by_book_count": lambda db: authors_crud.get_authors(
+            db, limit=20, offset=0, sort="-book_count"
+        ),
+        "authors.get_author": lambda db: authors_crud.get_author(db, ids.author),
+        "authors.update_author": lambda db: authors_crud.update_author(
+            db, ids.author, AuthorUpdate(username=f"adv-a-{suffix}", email=f"adv-a-{suffix}@example.com")
+        ),
+        "authors.login_author_for_access_token": lambda db: authors_crud.login_author_for_access_token(
+            SimpleNamespace(username=ids.author_email, password="not-the-password"), db
+        ),
+        "authors.get_current_author": lambda db: authors_crud.get_current_author(token, db),
+        "authors.create_profile": lambda db: authors_crud.create_profile(
+            ProfileCreate(author_id=ids.author, first_name="Index"), db
+        ),
+        "authors.get_all_profiles": lambda db: authors_crud.get_all_profiles(db),
+        "authors.get_profile_by_author_id": lambda db: authors_crud.get_profile_by_author_id(db, ids.profile_author),
+        "authors.update_profile": lambda db: authors_crud.update_profile(ProfileUpdate(bio="advisor"), ids.profile, db),
+        "orders.get_orders": lambda db: orders_crud.get_orders(db),
+        "orders.add_order": lambda db: orders_crud.add_order(
+            db, OrderCreate(author_id=ids.author, books=[OrderBookIn(book_id=ids.book, quantity=1)])
+        ),
+        # Deletes run last: they cascade through rows the other scenarios use.
+        "orders.delete_order": lambda db: orders_crud.delete_order(db, ids.order),
+        "authors.delete_profile_by_id": lambda db: authors_crud.delete_profile_by_id(ids.profile, db),
+        "books.delete_tag": lambda db: books_crud.crud_tag.delete_tag(db, ids.tag),
+        "books.delete_book": lambda db: books_crud.crud_book.delete_book(db, ids.book),
+        "books.delete_genre": lambda db: books_crud.crud_genre.delete_genre(db, ids.genre),
+        "authors.delete_author_by_id": lambda db: authors_crud.delete_author_by_id(db, ids.author),
+    }
+
+
+async def sample_ids(conn: AsyncConnection) -> SimpleNamespace:
+    async def first(column):
+        return await conn.scalar(select(func.min(column)))
+
+    author = await first(Book.author_id)
+    profile = (await conn.execute(select(Profile.id, Profile.author_id).limit(1))).first()
+    return SimpleNamespace(
+        author=author,
+        author_email=await conn.scalar(select(Author.email).where(Author.id == author)),
+        genre=await first(Genre.id),
+        book=await first(Book.id),
+        tag=await first(Tag.id),
+        order=await first(Order.id),
+        profile=profile.id if profile else None,
+        profile_author=profile.author_id if profile else author,
+    )
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def suggest_from_condition(table: str | None, condition: str | None) -> str | None:
+    if not table or not condition:
+        return None
+    match = FILTER_COLUMN.search(condition)
+    if not match:
+        return None
+    column = f"lower({match.group(2)})" if match.group(1) else match.group(2)
+    return f"CREATE INDEX CONCURRENTLY ON {table} ({column});"
+
+
+def analyze_plan(plan: dict, min_rows: int, min_loops: int) -> list[Finding]:
+    """Findings from an EXPLAIN (ANALYZE) plan, or from a plain EXPLAIN's estimates."""
+    findings = []
+    for node in walk(plan["Plan"]):
+        node_type = node["Node Type"]
+        loops = node.get("Actual Loops", 1)
+        rows = node.get("Actual Rows", node["Plan Rows"])
+        if node_type == "Seq Scan":
+            scanned = (rows + node.get("Rows Removed by Filter", 0)) * loops
+            if scanned >= min_rows:
+                table = node.get("Relation Name")
+                findings.append(
+                    Finding(
+                        "seq scan",
+                        f"{table}: {scanned} rows read, {rows * loops} kept"
+                        + (f", filter {node['Filter']}" if "Filter" in node else ""),
+                        suggest_from_condition(table, node.get("Filter")),
+                    )
+                )
+        elif node_type in ("Sort", "Incremental Sort") and node.get("Sort Space Type") == "Disk":
+            keys = ", ".join(node.get("Sort Key", []))
+            findings.append(
+                Finding(
+                    "sort spilled to disk",
+                    f"{node.get('Sort Space Used')} kB on disk, key {keys}",
+                    f"index matching the ORDER BY ({keys}) or a LIMIT to make it a top-N sort",
+                )
+            )
+        elif node_type == "Nested Loop":
+            outer, inner = node["Plans"][0], node["Plans"][-1]
+            inner_loops = inner.get("Actual Loops", outer["Plan Rows"])
+            if inner_loops >= min_loops:
+                table = inner.get("Relation Name")
+                condition = inner.get("Index Cond") or inner.get("Filter") or node.get("Join Filter")
+                findings.append(
+                    Finding(
+                        "nested loop",
+                        f"inner {inner['Node Type']} on {table or '?'} executed {inner_loops} times",
+                        suggest_from_condition(table, condition) if inner["Node Type"] == "Seq Scan" else None,
+                    )
+                )
+    return findings
+
+
+async def explain(conn: AsyncConnection, query: CapturedQuery, min_rows: int, min_loops: int) -> None:
+    # ANALYZE really executes the statement, so only reads get it: a write re-run after the scenarios would
+    # collide with the rows they inserted or miss the ones they deleted.
+    options = "FORMAT JSON" if query.statement.lstrip().upper().startswith(WRITES) else "ANALYZE, BUFFERS, FORMAT JSON"
+    try:
+        async with conn.begin_nested() as savepoint:
+            result = await conn.exec_driver_sql(f"EXPLAIN ({options}) {query.statement}", query.parameters)
+            plan = result.scalar_one()
+            await savepoint.rollback()
+    except DBAPIError as exc:
+        query.error = str(exc.orig).splitlines()[0]
+        return
+    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+    query.findings = analyze_plan(plan, min_rows, min_loops)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rows", type=int, default=10_000, help="flag sequential scans reading this many rows")
+    parser.add_argument("--loops", type=int, default=1_000, help="flag nested loops with this many inner loops")
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.DATABASE_URL)
+    captured: list[CapturedQuery] = []
+    current_function: list[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        if current_function and not statement.startswith(("EXPLAIN", "SAVEPOINT", "RELEASE", "ROLLBACK", "SET")):
+            captured.append(CapturedQuery(current_function[0], statement, parameters[0] if executemany else parameters))
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        ids = await sample_ids(conn)
+        db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        for name, scenario in build_scenarios(ids).items():
+            current_function[:] = [name]
+            try:
+                await scenario(db)
+            except HTTPException as exc:
+                print(f"{name}: {exc.status_code} {exc.detail} (queries still analyzed)")
+            except SQLAlchemyError as exc:
+                print(f"{name}: {type(exc).__name__} (queries still analyzed)")
+                await db.rollback()
+            current_function.clear()
+            db.expunge_all()
+
+        seen = set()
+        for query in captured:
+            if (query.function, query.statement) in seen:
+                continue
+            seen.add((query.function, query.statement))
+            await explain(conn, query, args.min_rows, args.loops)
+            if query.error:
+                status = f"not explainable: {query.error}"
+            else:
+                status = "ok" if not query.findings else f"{len(query.findings)} finding(s)"
+            print(f"\n[{query.function}] {status}\n  {' '.join(query.statement.split())[:200]}")
+            for finding in query.findings:
+                print(f"  - {finding.kind}: {finding.detail}")
+                if finding.suggestion:
+                    print(f"    suggestion: {finding.suggestion}")
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
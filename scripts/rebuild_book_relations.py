@@ -0,0 +1,38 @@
+"""Rebuild the "customers also ordered" table from the whole order history.
+
+Usage:
+    python -m scripts.rebuild_book_relations [--top-k 20]
+
+Run once after the book_relations migration, or after bulk-loading orders (e.g. with scripts.seed), to
+backfill the table; afterwards add_order keeps it current and the app rebuilds it every
+book_relations_rebuild_interval seconds. Safe to run while the app serves traffic.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.books.maintenance import rebuild_book_relations
+from src.config import settings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=settings.book_relations_top_k)
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.DATABASE_URL)
+    started = time.perf_counter()
+    async with AsyncSession(engine) as db:
+        rows = await rebuild_book_relations(db, args.top_k)
+    await engine.dispose()
+    if rows is None:
+        print("Another rebuild is in progress; nothing done")
+    else:
+        print(f"Changed {rows:,} related-book rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
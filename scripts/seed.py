@@ -0,0 +1,268 @@
+"""Bulk-load a synthetic dataset through COPY, in parallel, at production scale.
+
+Usage:
+    python -m scripts.seed --books 1300000 [--authors 260000 --tags 20000 --orders 1300000 --jobs 8]
+
+Defaults give roughly 10M rows: authors, genres, tags, books, book_tags (about 3 per book), orders and
+books_orders (about 2.5 per order). Tables are loaded level by level in foreign-key order (genres, tags and
+authors first, then books and orders, then book_tags and books_orders); within a level every table is split
+into id ranges that load concurrently, each in its own worker process and connection.
+
+Rows are skewed like real traffic: a few prolific authors write most books (Zipf), tag usage has a long
+tail, and a few bestsellers appear in most orders. Primary keys are assigned here, continuing after the
+current max(id) of each table, so existing rows are kept; sequences are moved past the new ids and
+denormalized counters recomputed at the end.
+Every author's password is SEED_PASSWORD, hashed once up front. Run scripts.rebuild_book_relations
+afterwards to fill the related-books table from the generated orders.
+"""
+
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+
+from src.authors.models import Author
+from src.authors.security import password_hash
+from src.books.models import Book, Genre, Tag, book_tag_association_table
+from src.config import settings
+from src.orders.models import BookOrder, Order
+
+SEED_PASSWORD = "seed-password"
+COPY_BUFFER_SIZE = 1 << 20
+EPOCH = datetime(2000, 1, 1)
+
+
+@dataclass(frozen=True)
+class Shape:
+    genres: int
+    tags: int
+    authors: int
+    books: int
+    orders: int
+    tags_per_book: int = 3
+    books_per_order: float = 2.5
+    skew: float = 1.1
+
+
+@dataclass(frozen=True)
+class Partition:
+    table: str
+    start: int  # offsets within the generated rows, [start, stop)
+    stop: int
+
+
+def conninfo() -> str:
+    return make_conninfo(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        dbname=settings.DB_NAME,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+    )
+
+
+def zipf_rank(rng: random.Random, n: int, s: float) -> int:
+    """1-based rank drawn with probability ~ 1 / rank ** s, by inverting the continuous CDF (O(1) per draw)."""
+    u = rng.random()
+    if s == 1:
+        return min(n, int(math.exp(u * math.log(n + 1))))
+    a = 1 - s
+    return max(1, min(n, int((((n + 1) ** a - 1) * u + 1) ** (1 / a))))
+
+
+def genres_rows(shape: Shape, base: dict, rng: random.Random, start: int, stop: int):
+    for i in range(start, stop):
+        genre_id = base["genres"] + i + 1
+        yield genre_id, f"Genre {genre_id}"
+
+
+def tags_rows(shape: Shape, base: dict, rng: random.Random, start: int, stop: int):
+    for i in range(start, stop):
+        tag_id = base["tags"] + i + 1
+        yield tag_id, f"tag-{tag_id}"
+
+
+def authors_rows(shape: Shape, base: dict, rng: random.Random, start: int, stop: int):
+    for i in range(start, stop):
+        author_id = base["authors"] + i + 1
+        yield author_id, f"author-{author_id}@example.com", f"author_{author_id}", base["password_hash"], True, False
+
+
+def books_rows(shape: Shape, base: dict, rng: random.Random, start: int, stop: int):
+    for i in range(start, stop):
+        book_id = base["books"] + i + 1
+        yield (
+            book_id,
+            f"Book {book_id}",
+            rng.randint(0, 5),
+            (EPOCH + timedelta(days=rng.randrange(9000))).isoformat(),
+            base["genres"] + rng.randint(1, shape.genres),
+            base["authors"] + zipf_rank(rng, shape.authors, shape.skew),
+        )
+
+
+def book_tags_rows(shape: Shape, base: dict, rng: random.Random, start: int, stop: int):
+    for i in range(start, stop):
+        book_id = base["books"] + i + 1
+        count = rng.randint(1, 2 * shape.tags_per_book - 1)
+        for tag_rank in {zipf_rank(rng, shape.tags, shape.skew) for _ in range(count)}:
+            yield book_id, base["tags"] + tag_rank
+
+
+def orders_rows(shape: Shape, base: dict, rng: random.Random, start: int, stop: int):
+    for i in range(start, stop):
+        yield (
+            base["orders"] + i + 1,
+            base["authors"] + rng.randint(1, shape.authors),
+            (EPOCH + timedelta(seconds=rng.randrange(25 * 365 * 86400))).isoformat(),
+        )
+
+
+def books_orders_rows(shape: Shape, base: dict, rng: random.Random, start: int, stop: int):
+    max_items = max(1, round(2 * shape.books_per_order - 1))
+    for i in range(start, stop):
+        order_id = base["orders"] + i + 1
+        count = rng.randint(1, max_items)
+        for book_rank in {zipf_rank(rng, shape.books, shape.skew) for _ in range(count)}:
+            yield base["books"] + book_rank, order_id, rng.randint(1, 3)
+
+
+# table -> (columns, row generator, count of parent rows the generator iterates over); ids are explicit
+# except books_orders, whose ids nothing references and the sequence fills in.
+TABLES = {
+    Genre.__tablename__: (("id", "name"), genres_rows, lambda shape: shape.genres),
+    Tag.__tablename__: (("id", "name"), tags_rows, lambda shape: shape.tags),
+    Author.__tablename__: (
+        ("id", "email", "username", "password_hash", "is_active", "is_superuser"),
+        authors_rows,
+        lambda shape: shape.authors,
+    ),
+    Book.__tablename__: (
+        ("id", "title", "rating", "date_published", "genre_id", "author_id"),
+        books_rows,
+        lambda shape: shape.books,
+    ),
+    book_tag_association_table.name: (("book_id", "tag_id"), book_tags_rows, lambda shape: shape.books),
+    Order.__tablename__: (("id", "author_id", "ordered_at"), orders_rows, lambda shape: shape.orders),
+    BookOrder.__tablename__: (("book_id", "order_id", "quantity"), books_orders_rows, lambda shape: shape.orders),
+}
+
+# Foreign-key order: every table only references tables of earlier levels.
+LEVELS = (
+    (Genre.__tablename__, Tag.__tablename__, Author.__tablename__),
+    (Book.__tablename__, Order.__tablename__),
+    (book_tag_association_table.name, BookOrder.__tablename__),
+)
+ID_TABLES = (Genre.__tablename__, Tag.__tablename__, Author.__tablename__, Book.__tablename__, Order.__tablename__)
+# Counters the CRUD layer keeps in step; COPY bypasses it, so they are recomputed once everything is loaded.
+RECOUNT_STATEMENTS = (
+    "UPDATE genres SET book_count = counts.n "
+    "FROM (SELECT genre_id, count(*) AS n FROM books GROUP BY genre_id) AS counts "
+    "WHERE genres.id = counts.genre_id AND genres.book_count <> counts.n",
+    "UPDATE tags SET usage_count = counts.n "
+    "FROM (SELECT tag_id, count(*) AS n FROM book_tags GROUP BY tag_id) AS counts "
+    "WHERE tags.id = counts.tag_id AND tags.usage_count <> counts.n",
+    "UPDATE authors SET book_count = counts.n, last_published = counts.latest "
+    "FROM (SELECT author_id, count(*) AS n, max(date_published) AS latest FROM books GROUP BY author_id) AS counts "
+    "WHERE authors.id = counts.author_id",
+    "UPDATE authors SET order_count = counts.n "
+    "FROM (SELECT author_id, count(*) AS n FROM orders GROUP BY author_id) AS counts "
+    "WHERE authors.id = counts.author_id AND authors.order_count <> counts.n",
+)
+
+
+def copy_line(row: tuple) -> str:
+    return "\t".join(
+        "\\N" if value is None else str(value).lower() if isinstance(value, bool) else str(value) for value in row
+    )
+
+
+def load_partition(shape: Shape, base: dict, partition: Partition, seed: int) -> int:
+    """Runs in a worker process: generate one id range of a table and stream it through COPY."""
+    columns, generate, _ = TABLES[partition.table]
+    rng = random.Random(f"{seed}:{partition.table}:{partition.start}")
+    rows = 0
+    with psycopg.connect(conninfo()) as conn:
+        conn.execute("SET synchronous_commit = off")
+        with conn.cursor().copy(f"COPY {partition.table} ({', '.join(columns)}) FROM STDIN") as copy:
+            buffer = []
+            size = 0
+            for row in generate(shape, base, rng, partition.start, partition.stop):
+                line = copy_line(row) + "\n"
+                buffer.append(line)
+                size += len(line)
+                rows += 1
+                if size >= COPY_BUFFER_SIZE:
+                    copy.write("".join(buffer))
+                    buffer.clear()
+                    size = 0
+            copy.write("".join(buffer))
+    return rows
+
+
+def partitions(table: str, count: int, jobs: int) -> list[Partition]:
+    size = max(1, math.ceil(count / jobs))
+    return [Partition(table, start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def seed_database(shape: Shape, jobs: int = 8, seed: int = 42) -> dict[str, int]:
+    with psycopg.connect(conninfo()) as conn:
+        base = {table: conn.execute(f"SELECT coalesce(max(id), 0) FROM {table}").fetchone()[0] for table in ID_TABLES}
+    base["password_hash"] = password_hash.hash(SEED_PASSWORD)
+
+    loaded = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for level in LEVELS:
+            started = time.perf_counter()
+            work = [
+                (table, pool.submit(load_partition, shape, base, partition, seed))
+                for table in level
+                for partition in partitions(table, TABLES[table][2](shape), jobs)
+            ]
+            for table, future in work:
+                loaded[table] = loaded.get(table, 0) + future.result()
+            counts = ", ".join(f"{table} {loaded[table]:,}" for table in level)
+            print(f"  {counts} in {time.perf_counter() - started:.1f}s")
+
+    with psycopg.connect(conninfo(), autocommit=True) as conn:
+        for table in ID_TABLES:
+            conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+        for statement in RECOUNT_STATEMENTS:
+            conn.execute(statement)
+        conn.execute("ANALYZE")
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1_300_000)
+    parser.add_argument("--authors", type=int, help="default: books / 5")
+    parser.add_argument("--tags", type=int, default=20_000)
+    parser.add_argument("--genres", type=int, default=50)
+    parser.add_argument("--orders", type=int, help="default: same as books")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for authors, tags and bestsellers")
+    parser.add_argument("--jobs", type=int, default=8, help="worker processes (and connections)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    shape = Shape(
+        genres=args.genres,
+        tags=args.tags,
+        authors=args.authors or max(1, args.books // 5),
+        books=args.books,
+        orders=args.orders if args.orders is not None else args.books,
+        skew=args.skew,
+    )
+    started = time.perf_counter()
+    loaded = seed_database(shape, args.jobs, args.seed)
+    print(f"Loaded {sum(loaded.values()):,} rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
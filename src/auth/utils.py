@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from functools import cache
 
 import bcrypt
 import jwt
@@ -9,9 +10,20 @@ from src.config import settings
 # >>> public_key = b"-----BEGIN PUBLIC KEY-----\nMHYwEAYHKoZIzj0CAQYFK4EEAC..."
 
 
+# Read on first use rather than at import, so importing the app needs neither the files nor the disk access.
+@cache
+def load_private_key() -> str:
+    return settings.auth_jwt.private_key_path.read_text()
+
+
+@cache
+def load_public_key() -> str:
+    return settings.auth_jwt.public_key_path.read_text()
+
+
 def encode_jwt(
     payload: dict,
-    private_key: str = settings.auth_jwt.private_key_path.read_text(),
+    private_key: str | None = None,
     algorithm: str = settings.auth_jwt.algorithm,
     expire_minutes: int = settings.auth_jwt.access_token_expire_minutes,
     expire_timedelta: timedelta | None = None,
@@ -28,7 +40,7 @@ def encode_jwt(
     )
     encoded = jwt.encode(
         to_encode,
-        private_key,
+        private_key or load_private_key(),
         algorithm=algorithm,
     )
     return encoded
@@ -36,12 +48,12 @@ def encode_jwt(
 
 def decode_jwt(
     token: str | bytes,
-    public_key: str = settings.auth_jwt.public_key_path.read_text(),
+    public_key: str | None = None,
     algorithm: str = settings.auth_jwt.algorithm,
 ) -> dict:
     decoded = jwt.decode(
         token,
-        public_key,
+        public_key or load_public_key(),
         algorithms=[algorithm],
     )
     return decoded
@@ -3,16 +3,23 @@ from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select, func
+from sqlalchemy import select, exists, func, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from src.authors import models
-from src.authors.schemas import AuthorCreate, AuthorUpdate, Token, ProfileCreate, ProfileUpdate
+from src.authors.schemas import AuthorCreate, AuthorSort, AuthorUpdate, Token, ProfileCreate, ProfileUpdate
 from src.authors.security import hash_password, oauth2_scheme, verify_access_token, verify_password, create_access_token
+from src.cache import response_cache
 from src.config import settings
+from src.database import release_connection
+from src.books.crud import uncount_books
+from src.books.models import Book
 from src.dependencies import get_db
 
+# Built once and reused by every authenticated request (see src.books.crud for the rationale).
+AUTHOR_BY_ID_STMT = select(models.Author).where(models.Author.id == bindparam("author_id"))
+
 
 async def create_author(author: AuthorCreate, db: Annotated[AsyncSession, Depends(get_db)]) -> models.Author:
     result = await db.execute(
@@ -29,10 +36,11 @@ async def create_author(author: AuthorCreate, db: Annotated[AsyncSession, Depend
     existing_email = result.scalar_one_or_none()
     if existing_email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    await db.commit()  # release the connection while hashing; the insert checks out a new one
     new_author = models.Author(
         username=author.username,
         email=author.email.lower(),
-        password_hash=hash_password(author.password),
+        password_hash=await hash_password(author.password),
     )
     db.add(new_author)
     await db.commit()
@@ -40,13 +48,20 @@ async def create_author(author: AuthorCreate, db: Annotated[AsyncSession, Depend
     return new_author
 
 
-async def get_authors(db: AsyncSession, limit, offset) -> list[models.Author]:
-    stmt = await db.execute(select(models.Author).order_by(models.Author.username).limit(limit).offset(offset))
-    return list(stmt.scalars().all())
+@release_connection
+async def get_authors(db: AsyncSession, limit, offset, sort: AuthorSort = "username") -> list[models.Author]:
+    # The stats are maintained columns, so every sort is a scan of an index (descending for the stats) rather
+    # than an aggregate over books and orders.
+    column = getattr(models.Author, sort.removeprefix("-"))
+    if sort.startswith("-"):
+        column = column.desc().nulls_last() if sort == "-last_published" else column.desc()
+    result = await db.execute(select(models.Author).order_by(column, models.Author.id).limit(limit).offset(offset))
+    return list(result.scalars().all())
 
 
+@release_connection
 async def get_author(db: AsyncSession, author_id) -> models.Author | None:
-    stmt = await db.execute(select(models.Author).where(models.Author.id == author_id))
+    stmt = await db.execute(AUTHOR_BY_ID_STMT, {"author_id": author_id})
     author = stmt.scalar_one_or_none()
     if author:
         return author
@@ -78,21 +93,36 @@ async def update_author(db: AsyncSession, author_id: int, author_update: AuthorU
         if result.scalar_one_or_none():
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
     if "password" in update_data:
-        author.password_hash = hash_password(update_data.pop("password"))
+        author.password_hash = await hash_password(update_data.pop("password"))
     for field, value in update_data.items():
         setattr(author, field, value)
     await db.commit()
+    await response_cache.invalidate(f"author:{author_id}")
     await db.refresh(author)
     return author
 
 
+async def set_author_image(db: AsyncSession, author: models.Author, image_file: str) -> models.Author:
+    author.image_file = image_file
+    await db.commit()
+    await response_cache.invalidate(f"author:{author.id}")
+    return author
+
+
+@release_connection
+async def image_in_use(db: AsyncSession, image_file: str) -> bool:
+    return await db.scalar(select(exists().where(models.Author.image_file == image_file)))
+
+
 async def delete_author_by_id(db: AsyncSession, author_id: int) -> None:
     stmt = await db.execute(select(models.Author).where(models.Author.id == author_id))
     author = stmt.scalar_one_or_none()
     if not author:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Author not found")
+    await uncount_books(db, Book.author_id == author_id)  # their books go with them
     await db.delete(author)
     await db.commit()
+    await response_cache.invalidate(f"author:{author_id}")
 
 
 async def login_author_for_access_token(
@@ -105,7 +135,8 @@ async def login_author_for_access_token(
         ),
     )
     author = result.scalar_one_or_none()
-    if not author or not verify_password(form_data.password, author.password_hash):
+    await db.commit()  # release the connection before the deliberately slow hash check
+    if not author or not await verify_password(form_data.password, author.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -116,6 +147,7 @@ async def login_author_for_access_token(
     return Token(access_token=access_token, token_type="bearer")
 
 
+@release_connection
 async def get_current_author(
     token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(get_db)]
 ) -> models.Author:
@@ -131,9 +163,7 @@ async def get_current_author(
         author_id_int = int(author_id)
     except (TypeError, ValueError):
         raise authentication_exc
-    result = await db.execute(
-        select(models.Author).where(models.Author.id == author_id_int),
-    )
+    result = await db.execute(AUTHOR_BY_ID_STMT, {"author_id": author_id_int})
     author = result.scalar_one_or_none()
     if not author:
         raise HTTPException(
@@ -142,6 +172,14 @@ async def get_current_author(
     return author
 
 
+async def get_current_superuser(
+    author: Annotated[models.Author, Depends(get_current_author)],
+) -> models.Author:
+    if not author.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return author
+
+
 async def create_profile(profile_create: ProfileCreate, db: Annotated[AsyncSession, Depends(get_db)]) -> models.Profile:
     stmt = select(models.Profile.id).where(models.Profile.author_id == profile_create.author_id)
     existing_profile = await db.execute(stmt)
@@ -154,12 +192,14 @@ async def create_profile(profile_create: ProfileCreate, db: Annotated[AsyncSessi
     return profile
 
 
+@release_connection
 async def get_all_profiles(db: Annotated[AsyncSession, Depends(get_db)]) -> list[models.Profile]:
     stmt = select(models.Profile).options(joinedload(models.Profile.author)).order_by(models.Profile.author_id)
     profiles = await db.execute(stmt)
     return list(profiles.scalars().all())
 
 
+@release_connection
 async def get_profile_by_author_id(db: AsyncSession, author_id: int) -> models.Profile:
     stmt = await db.execute(
         select(models.Profile).where(models.Profile.author_id == author_id).options(joinedload(models.Profile.author))
@@ -1,8 +1,10 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, Boolean
+from sqlalchemy import String, Boolean, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from src.media.storage import variant_urls
 from src.mixins import AuthorRelationMixin
 from src.models import Base
 
@@ -18,6 +20,11 @@ class Author(Base):
     image_file: Mapped[str | None] = mapped_column(String(200), nullable=True, default=None)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default="true")
     is_superuser: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    # Kept in step by BookCRUD and the order CRUD and reconciled periodically (src/books/maintenance.py), so
+    # the authors listing sorts by them without aggregating books and orders.
+    book_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    order_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    last_published: Mapped[datetime | None] = mapped_column(default=None)
 
     books: Mapped[list["Book"]] = relationship(back_populates="author", cascade="all, delete-orphan")
     profile: Mapped["Profile"] = relationship(back_populates="author", cascade="all, delete-orphan")
@@ -29,10 +36,25 @@ class Author(Base):
             return f"/media/profile_pics/{self.image_file}"
         return "/static/profile_pics/default.jpg"
 
+    @property
+    def image_variants(self) -> dict[str, str]:
+        return variant_urls("profile_pics", self.image_file)
+
     def __repr__(self) -> str:
         return f"Author(id={self.id}, username={self.username})"
 
 
+# Logins and signups look authors up case-insensitively, which the unique constraints can't serve.
+Index("ix_authors_email_lower", func.lower(Author.email))
+Index("ix_authors_username_lower", func.lower(Author.username))
+# GET /authors/?sort=-book_count (and the other descending stat sorts) read the first rows of these.
+Index("ix_authors_book_count", Author.book_count.desc(), Author.id)
+Index("ix_authors_order_count", Author.order_count.desc(), Author.id)
+Index("ix_authors_last_published", Author.last_published.desc().nulls_last(), Author.id).ddl_if(
+    dialect="postgresql"  # NULLS LAST in an index is PostgreSQL syntax
+)
+
+
 class Profile(AuthorRelationMixin, Base):
     _author_id_unique = True  # for a one-to-one relationship
     _author_back_populate = "profile"
@@ -1,15 +1,30 @@
 from typing import Annotated
 
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, BackgroundTasks, Request, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.authors import crud
-from src.authors.schemas import AuthorPrivate, AuthorCreate, AuthorPublic, AuthorUpdate, Token
+from src.authors import crud, models
+from src.authors.schemas import (
+    AuthorPrivate,
+    AuthorCreate,
+    AuthorPublic,
+    AuthorSort,
+    AuthorUpdate,
+    AuthorWithStats,
+    Token,
+)
 from src.authors.security import oauth2_scheme
-from src.dependencies import get_db
+from src.deadlines import DeadlineRoute
+from src.dependencies import get_db, get_read_db
+from src.media.storage import UPLOAD_BODY, discard_upload, generate_variants_in_background, save_upload
+from src.responses import model_response
 
-router = APIRouter(prefix="/authors", tags=["authors"])
+router = APIRouter(prefix="/authors", tags=["authors"], route_class=DeadlineRoute)
+
+authors_adapter = TypeAdapter(list[AuthorPublic])
+authors_with_stats_adapter = TypeAdapter(list[AuthorWithStats])
 
 
 @router.post("/", response_model=AuthorPrivate, status_code=status.HTTP_201_CREATED)
@@ -17,9 +32,17 @@ async def create_author(db: Annotated[AsyncSession, Depends(get_db)], author: Au
     return await crud.create_author(db=db, author=author)
 
 
-@router.get("/", response_model=list[AuthorPublic])
-async def get_authors(db: Annotated[AsyncSession, Depends(get_db)], limit: int = 20, offset: int = 0):
-    return await crud.get_authors(db=db, limit=limit, offset=offset)
+@router.get("/", response_model=list[AuthorWithStats] | list[AuthorPublic])
+async def get_authors(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    limit: int = 20,
+    offset: int = 0,
+    include_stats: bool = False,
+    sort: AuthorSort = "username",
+):
+    # include_stats adds book_count, order_count and last_published; sorting by them works without it too.
+    authors = await crud.get_authors(db=db, limit=limit, offset=offset, sort=sort)
+    return model_response(authors_with_stats_adapter if include_stats else authors_adapter, authors)
 
 
 @router.post("/login/", response_model=Token)
@@ -37,8 +60,26 @@ async def get_current_author(
     return await crud.get_current_author(db=db, token=token)
 
 
+@router.put("/me/image/", response_model=AuthorPrivate, openapi_extra=UPLOAD_BODY)
+async def upload_author_image(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_author: Annotated[models.Author, Depends(crud.get_current_author)],
+    request: Request,
+    background_tasks: BackgroundTasks,
+):
+    path = await save_upload(request.stream(), "profile_pics")
+    try:
+        author = await crud.set_author_image(db=db, author=current_author, image_file=path.name)
+    except Exception:
+        await db.rollback()
+        await discard_upload(path, lambda: crud.image_in_use(db, path.name))
+        raise
+    background_tasks.add_task(generate_variants_in_background, path, f"author:{author.id}")
+    return author
+
+
 @router.get("/{author_id}/", response_model=AuthorPublic)
-async def get_author(db: Annotated[AsyncSession, Depends(get_db)], author_id: int):
+async def get_author(db: Annotated[AsyncSession, Depends(get_read_db)], author_id: int):
     return await crud.get_author(db=db, author_id=author_id)
 
 
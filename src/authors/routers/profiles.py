@@ -1,18 +1,23 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.authors import crud, models
 from src.authors.schemas import Profile, ProfileCreate, ProfileCreateForMe, ProfileUpdate
-from src.dependencies import get_db
+from src.deadlines import DeadlineRoute
+from src.dependencies import get_db, get_read_db
+from src.responses import model_response
 
-router = APIRouter(prefix="/profiles", tags=["profiles"])
+router = APIRouter(prefix="/profiles", tags=["profiles"], route_class=DeadlineRoute)
+
+profiles_adapter = TypeAdapter(list[Profile])
 
 
 @router.get("/", response_model=list[Profile])
-async def get_profiles(db: AsyncSession = Depends(get_db)):
-    return await crud.get_all_profiles(db=db)
+async def get_profiles(db: AsyncSession = Depends(get_read_db)):
+    return model_response(profiles_adapter, await crud.get_all_profiles(db=db))
 
 
 @router.post("/create/", response_model=Profile, status_code=status.HTTP_201_CREATED)
@@ -34,7 +39,7 @@ async def get_my_profile(
 
 
 @router.get("/{author_id}/", response_model=Profile)
-async def get_profile(author_id: int, db: AsyncSession = Depends(get_db)):
+async def get_profile(author_id: int, db: AsyncSession = Depends(get_read_db)):
     return await crud.get_profile_by_author_id(db=db, author_id=author_id)
 
 
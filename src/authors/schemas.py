@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
@@ -27,6 +30,26 @@ class AuthorPublic(AuthorBase):
     username: str
     image_file: str | None
     image_path: str
+    image_variants: dict[str, str]
+
+
+class AuthorWithStats(AuthorPublic):
+    book_count: int
+    order_count: int
+    last_published: datetime | None
+
+
+# A field name, prefixed with "-" for descending order.
+AuthorSort = Literal[
+    "username",
+    "-username",
+    "book_count",
+    "-book_count",
+    "order_count",
+    "-order_count",
+    "last_published",
+    "-last_published",
+]
 
 
 class AuthorPrivate(AuthorPublic):
@@ -1,5 +1,6 @@
 from datetime import datetime, UTC, timedelta
 
+import anyio
 import jwt
 from fastapi.security import OAuth2PasswordBearer
 from pwdlib import PasswordHash
@@ -11,12 +12,14 @@ password_hash = PasswordHash.recommended()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/authors/login/")
 
 
-def hash_password(password: str) -> str:
-    return password_hash.hash(password)
+# Hashing is deliberately slow CPU work: it runs in the thread pool so it doesn't stall the event loop for
+# every other request.
+async def hash_password(password: str) -> str:
+    return await anyio.to_thread.run_sync(password_hash.hash, password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return password_hash.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await anyio.to_thread.run_sync(password_hash.verify, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
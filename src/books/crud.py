@@ -1,19 +1,161 @@
 from fastapi import HTTPException, status
-from sqlalchemy import select, and_, insert, exists
+from sqlalchemy import (
+    bindparam,
+    select,
+    and_,
+    delete,
+    insert,
+    exists,
+    func,
+    lambda_stmt,
+    literal,
+    not_,
+    update,
+    StatementLambdaElement,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from src.authors.models import Author
 from src.books import models
-from src.books.schemas import GenreCreate, GenreUpdate, BookCreate, BookUpdate, TagCreate, TagUpdate
+from src.books.schemas import BookSort, GenreCreate, GenreUpdate, BookCreate, BookUpdate, TagCreate, TagUpdate
+from src.cache import response_cache
+from src.config import settings
+from src.database import release_connection
+from src.orders.models import BookOrder
+from src.singleflight import single_flight
+
+# Hot statements are built once: execution skips statement construction, and the fixed SQL text
+# lets psycopg prepare them server-side (see DB_PREPARE_THRESHOLD).
+GENRES_STMT = select(models.Genre).order_by(models.Genre.name)
+TAGS_STMT = select(models.Tag).order_by(models.Tag.name)
+POPULAR_TAGS_STMT = (
+    select(models.Tag)
+    .where(models.Tag.usage_count > 0)
+    .order_by(models.Tag.usage_count.desc(), models.Tag.id)
+    .limit(bindparam("limit"))
+)
+BOOK_SORT_COLUMNS = {
+    "title": models.Book.title,
+    "date_published": models.Book.date_published,
+    "rating": models.Book.rating,
+}
+
+
+def book_with_relations_stmt(book_id: int) -> StatementLambdaElement:
+    # Loader options can't be built at import time (mappers aren't configured yet), so this is a lambda
+    # statement: the lambdas are analyzed once and later calls only re-bind book_id.
+    stmt = lambda_stmt(
+        lambda: select(models.Book).options(
+            joinedload(models.Book.genre), joinedload(models.Book.author), selectinload(models.Book.tags)
+        )
+    )
+    stmt += lambda s: s.where(models.Book.id == book_id)
+    return stmt
+
+
+async def change_book_count(db: AsyncSession, genre_id: int, delta: int) -> None:
+    # An in-place increment: concurrent writers to the same genre serialize on the row instead of losing updates.
+    await db.execute(
+        update(models.Genre).where(models.Genre.id == genre_id).values(book_count=models.Genre.book_count + delta)
+    )
+
+
+async def change_tag_usage(db: AsyncSession, tag_id: int, delta: int) -> None:
+    await db.execute(
+        update(models.Tag).where(models.Tag.id == tag_id).values(usage_count=models.Tag.usage_count + delta)
+    )
+
+
+async def change_author_books(db: AsyncSession, author_id: int, delta: int) -> None:
+    """Move the author's book_count by `delta` and recompute last_published from their books (one descent of
+    ix_books_author_id_date_published), so it stays exact when the latest book moves or goes. Run it once
+    the book changes are flushed."""
+    latest = select(func.max(models.Book.date_published)).where(models.Book.author_id == Author.id)
+    await db.execute(
+        update(Author)
+        .where(Author.id == author_id)
+        .values(book_count=Author.book_count + delta, last_published=latest.scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def record_co_occurrences(db: AsyncSession, order_id: int) -> None:
+    """Count one more order for every pair of distinct books in order `order_id`, in both directions.
+
+    The pairs come from the order's books_orders rows (flushed by the caller) in one INSERT ... SELECT, so the
+    statement carries a single parameter however many books the order has."""
+    relations = models.book_relations_table
+    first, second = aliased(BookOrder), aliased(BookOrder)
+    pairs = (
+        select(first.book_id, second.book_id, literal(1))
+        .join(second, and_(second.order_id == first.order_id, second.book_id != first.book_id))
+        .where(first.order_id == order_id)
+        # Rows go in key order, so concurrent orders sharing books lock the same rows in the same order.
+        .order_by(first.book_id, second.book_id)
+    )
+    stmt = pg_insert(relations).from_select(["book_id", "related_book_id", "score"], pairs)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[relations.c.book_id, relations.c.related_book_id], set_={"score": relations.c.score + 1}
+    )
+    await db.execute(stmt)
+
+
+async def uncount_books(db: AsyncSession, condition) -> None:
+    """Take the books matching `condition` out of the maintained counters, ahead of deleting them in the same
+    transaction (directly or through a cascade)."""
+    counts = (
+        select(models.Book.genre_id, func.count().label("books"))
+        .where(condition)
+        .group_by(models.Book.genre_id)
+        .subquery()
+    )
+    await db.execute(
+        update(models.Genre)
+        .where(models.Genre.id == counts.c.genre_id)
+        .values(book_count=models.Genre.book_count - counts.c.books)
+        .execution_options(synchronize_session=False)
+    )
+    book_tags = models.book_tag_association_table
+    uses = (
+        select(book_tags.c.tag_id, func.count().label("uses"))
+        .join(models.Book, models.Book.id == book_tags.c.book_id)
+        .where(condition)
+        .group_by(book_tags.c.tag_id)
+        .subquery()
+    )
+    await db.execute(
+        update(models.Tag)
+        .where(models.Tag.id == uses.c.tag_id)
+        .values(usage_count=models.Tag.usage_count - uses.c.uses)
+        .execution_options(synchronize_session=False)
+    )
+    books = (
+        select(models.Book.author_id, func.count().label("books"))
+        .where(condition)
+        .group_by(models.Book.author_id)
+        .subquery()
+    )
+    remaining = select(func.max(models.Book.date_published)).where(models.Book.author_id == Author.id, not_(condition))
+    await db.execute(
+        update(Author)
+        .where(Author.id == books.c.author_id)
+        .values(book_count=Author.book_count - books.c.books, last_published=remaining.scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
 
 
 class GenreCRUD:
     @staticmethod
+    @single_flight()
+    @release_connection
     async def get_genres(db: AsyncSession) -> list[models.Genre]:
-        stmt = await db.execute(select(models.Genre).order_by(models.Genre.name))
+        stmt = await db.execute(GENRES_STMT)
         return list(stmt.scalars().all())
 
     @staticmethod
+    @release_connection
     async def get_genre(db: AsyncSession, genre_id: int) -> models.Genre:
         stmt = await db.execute(select(models.Genre).where(models.Genre.id == genre_id))
         genre = stmt.scalars().first()
@@ -22,17 +164,27 @@ class GenreCRUD:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found")
 
     @staticmethod
-    async def get_genre_with_books(db: AsyncSession, genre_id: int) -> models.Genre:
+    @release_connection
+    async def get_genre_with_books(
+        db: AsyncSession, genre_id: int, limit: int, offset: int, sort: BookSort
+    ) -> tuple[models.Genre, list[models.Book]]:
+        genre = await db.scalar(select(models.Genre).where(models.Genre.id == genre_id))
+        if not genre:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found")
+        column = BOOK_SORT_COLUMNS[sort.removeprefix("-")]
+        # Only the requested window of the genre's books is loaded; id breaks ties so pages don't overlap, in
+        # the sort's direction so ix_books_genre_id_date_published serves either date order as one scan.
+        order = (column.desc(), models.Book.id.desc()) if sort.startswith("-") else (column, models.Book.id)
         stmt = (
-            select(models.Genre)
-            .where(models.Genre.id == genre_id)
-            .options(selectinload(models.Genre.books).joinedload(models.Book.author))
+            select(models.Book)
+            .where(models.Book.genre_id == genre_id)
+            .options(joinedload(models.Book.author))
+            .order_by(*order)
+            .limit(limit)
+            .offset(offset)
         )
-        result = await db.execute(stmt)
-        genre = result.scalars().first()
-        if genre:
-            return genre
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found")
+        books = await db.scalars(stmt)
+        return genre, list(books)
 
     @staticmethod
     async def create_genre(db: AsyncSession, genre_create: GenreCreate) -> models.Genre:
@@ -43,6 +195,7 @@ class GenreCRUD:
         except IntegrityError:
             await db.rollback()
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Genre with this name already exists")
+        await response_cache.invalidate("genres")
         await db.refresh(genre)
         return genre
 
@@ -56,6 +209,7 @@ class GenreCRUD:
         for field, value in update_data.items():
             setattr(genre, field, value)
         await db.commit()
+        await response_cache.invalidate(f"genre:{genre_id}", "genres")
         await db.refresh(genre)
         return genre
 
@@ -65,12 +219,15 @@ class GenreCRUD:
         genre = stmt.scalar_one_or_none()
         if not genre:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genre not found")
+        await uncount_books(db, models.Book.genre_id == genre_id)  # its books go with it
         await db.delete(genre)
         await db.commit()
+        await response_cache.invalidate(f"genre:{genre_id}", "genres")
 
 
 class BookCRUD:
     @staticmethod
+    @release_connection
     async def get_books(db: AsyncSession) -> list[models.Book]:
         stmt = await db.execute(
             select(models.Book)
@@ -80,17 +237,31 @@ class BookCRUD:
         return list(stmt.scalars().all())
 
     @staticmethod
+    @single_flight()
+    @release_connection
     async def get_book(db: AsyncSession, book_id: int) -> models.Book:
-        stmt = await db.execute(
-            select(models.Book)
-            .where(models.Book.id == book_id)
-            .options(joinedload(models.Book.genre), joinedload(models.Book.author), selectinload(models.Book.tags))
-        )
+        stmt = await db.execute(book_with_relations_stmt(book_id))
         book = stmt.scalars().first()
         if book:
             return book
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
+    @staticmethod
+    @release_connection
+    async def get_related_books(db: AsyncSession, book_id: int, limit: int) -> list[models.Book]:
+        relations = models.book_relations_table
+        stmt = (
+            select(models.Book)
+            .join(relations, relations.c.related_book_id == models.Book.id)
+            .where(relations.c.book_id == book_id)
+            .options(joinedload(models.Book.genre), joinedload(models.Book.author))
+            .order_by(relations.c.score.desc(), relations.c.related_book_id)
+            # Increments between rebuilds add rows past the top_k a rebuild keeps; answer as if they were trimmed.
+            .limit(min(limit, settings.book_relations_top_k))
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
     @staticmethod
     async def create_book(db: AsyncSession, book_create: BookCreate) -> models.Book:
         stmt = select(models.Book.id).where(models.Book.title == book_create.title)
@@ -99,6 +270,9 @@ class BookCRUD:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Book with this title already exists")
         book = models.Book(**book_create.model_dump())
         db.add(book)
+        await db.flush()
+        await change_book_count(db, book.genre_id, 1)
+        await change_author_books(db, book.author_id, 1)
         await db.commit()
         await db.refresh(book, attribute_names=["genre", "author"])
         return book
@@ -119,9 +293,21 @@ class BookCRUD:
             result = await db.execute(stmt)
             if result.scalar_one_or_none():
                 raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Book with this title already exists")
+        new_genre_id = update_data.get("genre_id")
+        if new_genre_id is not None and new_genre_id != book.genre_id:
+            await change_book_count(db, book.genre_id, -1)
+            await change_book_count(db, new_genre_id, 1)
+        old_author_id, old_published = book.author_id, book.date_published
         for field, value in update_data.items():
             setattr(book, field, value)
+        await db.flush()
+        if book.author_id != old_author_id:
+            await change_author_books(db, old_author_id, -1)
+            await change_author_books(db, book.author_id, 1)
+        elif book.date_published != old_published:
+            await change_author_books(db, book.author_id, 0)
         await db.commit()
+        await response_cache.invalidate(f"book:{book_id}")
         await db.refresh(book, attribute_names=["genre", "author"])
         return book
 
@@ -131,8 +317,32 @@ class BookCRUD:
         book = stmt.scalars().first()
         if not book:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+        await uncount_books(db, models.Book.id == book_id)
         await db.delete(book)
         await db.commit()
+        await response_cache.invalidate(f"book:{book_id}")
+
+    @staticmethod
+    @release_connection
+    async def check_book_exists(db: AsyncSession, book_id: int) -> None:
+        if not await db.scalar(select(exists().where(models.Book.id == book_id))):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+
+    @staticmethod
+    @release_connection
+    async def image_in_use(db: AsyncSession, image_file: str) -> bool:
+        return await db.scalar(select(exists().where(models.Book.image_file == image_file)))
+
+    @staticmethod
+    async def set_book_image(db: AsyncSession, book_id: int, image_file: str) -> models.Book:
+        book = await db.scalar(select(models.Book).where(models.Book.id == book_id))
+        if not book:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+        book.image_file = image_file
+        await db.commit()
+        await response_cache.invalidate(f"book:{book_id}")
+        await db.refresh(book, attribute_names=["genre", "author"])
+        return book
 
     @staticmethod
     async def attach_tag_to_book(db: AsyncSession, book_id: int, tag_id: int) -> models.Book:
@@ -157,24 +367,40 @@ class BookCRUD:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Tag for this book already exists")
         stmt = insert(models.book_tag_association_table).values(book_id=book_id, tag_id=tag_id)
         await db.execute(stmt)
+        await change_tag_usage(db, tag_id, 1)
         await db.commit()
-        stmt = (
-            select(models.Book)
-            .options(joinedload(models.Book.genre), joinedload(models.Book.author), selectinload(models.Book.tags))
-            .where(models.Book.id == book_id)
-        )
-        result = await db.execute(stmt)
+        await response_cache.invalidate(f"book:{book_id}")
+        result = await db.execute(book_with_relations_stmt(book_id))
         return result.scalars().first()
 
+    @staticmethod
+    async def detach_tag_from_book(db: AsyncSession, book_id: int, tag_id: int) -> None:
+        book_tags = models.book_tag_association_table
+        result = await db.execute(delete(book_tags).where(book_tags.c.book_id == book_id, book_tags.c.tag_id == tag_id))
+        if result.rowcount == 0:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag is not attached to this book")
+        await change_tag_usage(db, tag_id, -1)
+        await db.commit()
+        await response_cache.invalidate(f"book:{book_id}")
+
 
 class TagCrud:
     @staticmethod
+    @single_flight()
+    @release_connection
     async def get_all_tags(db: AsyncSession) -> list[models.Tag]:
-        stmt = await db.execute(select(models.Tag).order_by(models.Tag.name))
+        stmt = await db.execute(TAGS_STMT)
         tags = stmt.scalars().all()
         return list(tags)
 
     @staticmethod
+    @release_connection
+    async def get_popular_tags(db: AsyncSession, limit: int) -> list[models.Tag]:
+        result = await db.execute(POPULAR_TAGS_STMT, {"limit": limit})
+        return list(result.scalars().all())
+
+    @staticmethod
+    @release_connection
     async def get_tag_by_id(db: AsyncSession, tag_id: int) -> models.Tag:
         stmt = await db.execute(select(models.Tag).where(models.Tag.id == tag_id))
         tag = stmt.scalar_one_or_none()
@@ -191,6 +417,7 @@ class TagCrud:
         except IntegrityError:
             await db.rollback()
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Tag already exists")
+        await response_cache.invalidate("tags")
         await db.refresh(tag)
         return tag
 
@@ -206,6 +433,7 @@ class TagCrud:
         except IntegrityError:
             await db.rollback()
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Tag already exists")
+        await response_cache.invalidate(f"tag:{tag_id}", "tags")
         await db.refresh(tag)
         return tag
 
@@ -216,6 +444,7 @@ class TagCrud:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
         await db.delete(tag)
         await db.commit()
+        await response_cache.invalidate(f"tag:{tag_id}", "tags")
 
 
 crud_genre = GenreCRUD()
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Select,
+    Table,
+    and_,
+    delete,
+    exists,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.authors.models import Author
+from src.books import models
+from src.database import AsyncSessionLocal, engine
+from src.orders.models import BookOrder, Order
+
+logger = logging.getLogger(__name__)
+
+# What a book_relations rebuild changes, per pair: the recounted score (NULL past top_k) and the table's score
+# at the same snapshot (NULL without a row). Lives for the rebuild's transaction.
+relations_staging = Table(
+    "book_relations_staging",
+    MetaData(),
+    Column("book_id", Integer, nullable=False),
+    Column("related_book_id", Integer, nullable=False),
+    Column("score", Integer),
+    Column("live_score", Integer),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+async def reconcile_counters(db: AsyncSession) -> int | None:
+    """Recompute the counters the CRUD layer maintains incrementally from the rows they count, fixing drift
+    from writes that bypass it (bulk loads, manual SQL). Only rows that are off are written; returns how many,
+    or None when another session is already reconciling."""
+    if not await db.scalar(select(func.pg_try_advisory_xact_lock(func.hashtext("counters")))):
+        return None
+    book_tags = models.book_tag_association_table
+    genre_books = select(func.count()).where(models.Book.genre_id == models.Genre.id).scalar_subquery()
+    tag_uses = select(func.count()).where(book_tags.c.tag_id == models.Tag.id).scalar_subquery()
+    author_books = select(func.count()).where(models.Book.author_id == Author.id).scalar_subquery()
+    author_orders = select(func.count()).where(Order.author_id == Author.id).scalar_subquery()
+    latest = select(func.max(models.Book.date_published)).where(models.Book.author_id == Author.id).scalar_subquery()
+    fixed = 0
+    for stmt in (
+        update(models.Genre).where(models.Genre.book_count != genre_books).values(book_count=genre_books),
+        update(models.Tag).where(models.Tag.usage_count != tag_uses).values(usage_count=tag_uses),
+        update(Author)
+        .where((Author.book_count != author_books) | Author.last_published.is_distinct_from(latest))
+        .values(book_count=author_books, last_published=latest),
+        update(Author).where(Author.order_count != author_orders).values(order_count=author_orders),
+    ):
+        result = await db.execute(stmt.execution_options(synchronize_session=False))
+        fixed += result.rowcount
+    await db.commit()
+    if fixed:
+        logger.warning("Reconciled %d drifted genre/tag/author counters", fixed)
+    return fixed
+
+
+async def rebuild_book_relations(db: AsyncSession, top_k: int) -> int | None:
+    """Recount book_relations from the whole order history, keeping the top_k related books per book.
+
+    The recount doesn't block writers: one statement compares it with the table as of the same snapshot and
+    stages only the rows that differ. Applying those takes the table lock briefly, and every score applied
+    keeps the increments add_order made since the snapshot. Pairs past top_k are deleted, which trims the
+    rows increments added since the last rebuild.
+
+    Returns the number of rows changed, or None when another worker is already rebuilding."""
+    relations = models.book_relations_table
+    if not await db.scalar(select(func.pg_try_advisory_xact_lock(func.hashtext(relations.name)))):
+        return None
+
+    first, second = aliased(BookOrder), aliased(BookOrder)
+    pairs = (
+        select(first.book_id, second.book_id.label("related_book_id"), func.count().label("score"))
+        .join(second, and_(second.order_id == first.order_id, second.book_id != first.book_id))
+        .group_by(first.book_id, second.book_id)
+        .subquery()
+    )
+    rank = func.row_number().over(
+        partition_by=pairs.c.book_id, order_by=(pairs.c.score.desc(), pairs.c.related_book_id)
+    )
+    ranked = select(pairs, rank.label("rank")).subquery()
+    top = select(ranked.c.book_id, ranked.c.related_book_id, ranked.c.score).where(ranked.c.rank <= top_k).subquery()
+    same_pair = and_(top.c.book_id == relations.c.book_id, top.c.related_book_id == relations.c.related_book_id)
+    diff = (
+        select(
+            func.coalesce(top.c.book_id, relations.c.book_id),
+            func.coalesce(top.c.related_book_id, relations.c.related_book_id),
+            top.c.score,
+            relations.c.score,
+        )
+        .select_from(top.join(relations, same_pair, full=True))
+        .where(top.c.score.is_distinct_from(relations.c.score))
+    )
+    await db.run_sync(lambda session: relations_staging.create(session.connection()))
+    await db.execute(insert(relations_staging).from_select(["book_id", "related_book_id", "score", "live_score"], diff))
+
+    await db.execute(text(f"LOCK TABLE {relations.name} IN EXCLUSIVE MODE"))
+    staged = and_(
+        relations_staging.c.book_id == relations.c.book_id,
+        relations_staging.c.related_book_id == relations.c.related_book_id,
+    )
+    kept = relations_staging.c.score.is_not(None)
+    books_exist = and_(
+        exists().where(models.Book.id == relations_staging.c.book_id),
+        exists().where(models.Book.id == relations_staging.c.related_book_id),
+    )
+    changed = 0
+    for stmt in (
+        delete(relations).where(staged, ~kept),
+        update(relations)
+        .where(staged, kept)
+        .values(score=relations_staging.c.score + relations.c.score - func.coalesce(relations_staging.c.live_score, 0)),
+        insert(relations).from_select(
+            ["book_id", "related_book_id", "score"],
+            select(relations_staging.c.book_id, relations_staging.c.related_book_id, relations_staging.c.score).where(
+                kept, ~exists().where(staged), books_exist
+            ),
+        ),
+    ):
+        result = await db.execute(stmt)
+        changed += result.rowcount
+    await db.commit()
+    logger.info("Rebuilt book relations: %d rows changed", changed)
+    return changed
+
+
+async def run_periodically(interval: float, job: Callable[..., Awaitable], *args) -> None:
+    """Run `job(db, *args)` every `interval` seconds in its own session, for as long as the app runs.
+
+    Every worker schedules the job, but a round only runs in the worker holding the job's session-level
+    advisory lock, on a connection it keeps for the purpose; the others try to take the lock each round, so
+    one of them takes over when the holder exits or loses its connection. Rounds are spread by up to 10% of
+    the interval, so workers started together don't all reach for the lock at the same moment."""
+    lock = select(func.pg_try_advisory_lock(func.hashtext(f"periodic:{job.__name__}")))
+    holder = None
+    try:
+        while True:
+            await asyncio.sleep(interval * random.uniform(0.9, 1.1))
+            try:
+                holder = await keep_lock(holder, lock)
+            except SQLAlchemyError:
+                logger.exception("Could not take the lock for periodic %s", job.__name__)
+                holder = None
+            if holder is None:
+                continue
+            try:
+                async with AsyncSessionLocal() as db:
+                    await job(db, *args)
+            except SQLAlchemyError:
+                logger.exception("Periodic %s failed", job.__name__)
+    finally:
+        if holder is not None:
+            await release_lock(holder)
+
+
+async def keep_lock(holder: AsyncConnection | None, lock: Select) -> AsyncConnection | None:
+    """The connection holding `lock`: `holder` while it is still connected, else a new one if the lock is
+    free. None when another worker holds it."""
+    if holder is not None:
+        try:
+            await holder.scalar(select(1))  # a live session still holds its advisory locks
+            await holder.commit()
+            return holder
+        except SQLAlchemyError:
+            await release_lock(holder)
+    conn = await engine.connect()
+    try:
+        acquired = await conn.scalar(lock)
+        await conn.commit()  # a session-level lock outlives the transaction
+    except BaseException:
+        await release_lock(conn)
+        raise
+    if acquired:
+        return conn
+    await conn.close()
+    return None
+
+
+async def release_lock(holder: AsyncConnection) -> None:
+    # Returned to the pool, the connection would keep the lock; discarding it ends the session.
+    await holder.invalidate()
+    await holder.close()
@@ -1,9 +1,10 @@
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, ForeignKey, func, Table, Column, Integer
+from sqlalchemy import String, ForeignKey, func, Table, Column, Integer, Index
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
+from src.media.storage import variant_urls
 from src.mixins import AuthorRelationMixin
 from src.models import Base
 
@@ -15,11 +16,34 @@ book_tag_association_table = Table(
     Base.metadata,
     Column("book_id", Integer, ForeignKey("books.id"), primary_key=True),
     Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+    # The primary key only serves lookups by book_id.
+    Index("ix_book_tags_tag_id", "tag_id"),
+)
+
+
+# "Customers also ordered": score is how many orders contain both books. add_order bumps the scores of the
+# pairs it creates; a periodic rebuild (src/books/maintenance.py) recounts and keeps the top rows per book.
+book_relations_table = Table(
+    "book_relations",
+    Base.metadata,
+    Column("book_id", Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True),
+    Column("related_book_id", Integer, ForeignKey("books.id", ondelete="CASCADE"), primary_key=True),
+    Column("score", Integer, nullable=False),
+    Index("ix_book_relations_related_book_id", "related_book_id"),
+)
+# Serves GET /books/{id}/related/ as one range scan in score order.
+Index(
+    "ix_book_relations_book_id_score",
+    book_relations_table.c.book_id,
+    book_relations_table.c.score.desc(),
+    book_relations_table.c.related_book_id,
 )
 
 
 class Genre(Base):
     name: Mapped[str] = mapped_column(String(50), unique=True)
+    # Kept in step by BookCRUD, so paginated listings don't count(*) the genre's books on every request.
+    book_count: Mapped[int] = mapped_column(default=0, server_default="0")
 
     books: Mapped[list["Book"]] = relationship(back_populates="genre", cascade="all, delete-orphan")
 
@@ -30,6 +54,8 @@ class Genre(Base):
 class Tag(Base):
     name: Mapped[str] = mapped_column(String(50), unique=True)
     created_at: Mapped[datetime] = mapped_column(server_default=func.now(), default=datetime.now(timezone.utc))
+    # Books carrying the tag, kept in step by BookCRUD and reconciled periodically (src/books/maintenance.py).
+    usage_count: Mapped[int] = mapped_column(default=0, server_default="0")
 
     books: Mapped[list["Book"]] = relationship(secondary=book_tag_association_table, back_populates="tags")
 
@@ -39,11 +65,12 @@ class Tag(Base):
 
 class Book(AuthorRelationMixin, Base):
     _author_back_populate = "books"
+    _author_id_index = False  # ix_books_author_id_date_published serves lookups by author
     title: Mapped[str] = mapped_column(String(100), unique=True)
     rating: Mapped[int] = mapped_column(default=0)
     date_published: Mapped[datetime]
     image_file: Mapped[str | None] = mapped_column(String(200), nullable=True, default=None)
-    genre_id: Mapped[int] = mapped_column(ForeignKey("genres.id"))
+    genre_id: Mapped[int] = mapped_column(ForeignKey("genres.id"), index=True)
 
     genre: Mapped["Genre"] = relationship(back_populates="books")
     tags: Mapped[list["Tag"]] = relationship(secondary=book_tag_association_table, back_populates="books")
@@ -55,5 +82,17 @@ class Book(AuthorRelationMixin, Base):
             return f"/media/book_pics/{self.image_file}"
         return "/static/book_pics/default.jpg"
 
+    @property
+    def image_variants(self) -> dict[str, str]:
+        return variant_urls("book_pics", self.image_file)
+
     def __repr__(self) -> str:
         return f"Book(id={self.id}, rating={self.rating}, date_published={self.date_published})"
+
+
+# Serves a genre's books page by page in the default newest-first order without sorting the whole genre.
+Index("ix_books_genre_id_date_published", Book.genre_id, Book.date_published, Book.id)
+# GET /tags/popular/ reads the first rows of this index instead of counting book_tags.
+Index("ix_tags_usage_count", Tag.usage_count.desc(), Tag.id)
+# Books by author, and an author's latest publication date in one descent when a book changes.
+Index("ix_books_author_id_date_published", Book.author_id, Book.date_published)
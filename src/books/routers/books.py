@@ -1,20 +1,47 @@
 from typing import Annotated
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, BackgroundTasks, Query, Request, status, Depends
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.books import crud, schemas
-from src.dependencies import get_db
+from src.cache import response_cache
+from src.deadlines import DeadlineRoute
+from src.dependencies import get_db, get_read_db
+from src.media.storage import UPLOAD_BODY, discard_upload, generate_variants_in_background, save_upload
+from src.responses import ModelResponse, model_response
 
-router = APIRouter(prefix="/books", tags=["books"])
+router = APIRouter(prefix="/books", tags=["books"], route_class=DeadlineRoute)
+
+books_adapter = TypeAdapter(list[schemas.Book])
+book_adapter = TypeAdapter(schemas.BookWithTags)
 
 
 @router.get("/", response_model=list[schemas.Book])
-async def get_books(db: Annotated[AsyncSession, Depends(get_db)]):
-    return await crud.crud_book.get_books(db)
+async def get_books(db: Annotated[AsyncSession, Depends(get_read_db)]):
+    return model_response(books_adapter, await crud.crud_book.get_books(db))
 
 
 @router.get("/{book_id}/", response_model=schemas.BookWithTags)
-async def get_book(db: Annotated[AsyncSession, Depends(get_db)], book_id: int):
-    return await crud.crud_book.get_book(db, book_id)
+async def get_book(db: Annotated[AsyncSession, Depends(get_read_db)], book_id: int):
+    # A hit is served without a connection checkout (the session is lazy) or any serialization.
+    key = f"book:{book_id}"
+    if (body := await response_cache.get(key)) is not None:
+        return ModelResponse(body)
+    generation = await response_cache.generation()
+    book = await crud.crud_book.get_book(db, book_id)
+    response = model_response(book_adapter, book)
+    tags = [key, f"author:{book.author_id}", f"genre:{book.genre_id}", *(f"tag:{tag.id}" for tag in book.tags)]
+    await response_cache.set(key, response.body, tags, generation)
+    return response
+
+
+@router.get("/{book_id}/related/", response_model=list[schemas.Book])
+async def get_related_books(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    book_id: int,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    # Precomputed from order history; an unknown book or one never ordered with others has none.
+    return model_response(books_adapter, await crud.crud_book.get_related_books(db, book_id, limit))
 
 
 @router.post("/", response_model=schemas.Book, status_code=status.HTTP_201_CREATED)
@@ -39,6 +66,28 @@ async def delete_book(db: Annotated[AsyncSession, Depends(get_db)], book_id: int
     return await crud.crud_book.delete_book(db, book_id)
 
 
+@router.put("/{book_id}/image/", response_model=schemas.Book, openapi_extra=UPLOAD_BODY)
+async def upload_book_image(
+    db: Annotated[AsyncSession, Depends(get_db)], book_id: int, request: Request, background_tasks: BackgroundTasks
+):
+    # Reject an unknown book before streaming its body to disk; the check doesn't hold a connection meanwhile.
+    await crud.crud_book.check_book_exists(db, book_id)
+    path = await save_upload(request.stream(), "book_pics")
+    try:
+        book = await crud.crud_book.set_book_image(db, book_id, path.name)
+    except Exception:  # e.g. the book was deleted during the upload
+        await db.rollback()
+        await discard_upload(path, lambda: crud.crud_book.image_in_use(db, path.name))
+        raise
+    background_tasks.add_task(generate_variants_in_background, path, f"book:{book_id}")
+    return book
+
+
 @router.put("/{book_id}/tags/{tag_id}/", response_model=schemas.BookWithTags)
 async def attach_tag(db: Annotated[AsyncSession, Depends(get_db)], book_id: int, tag_id: int):
     return await crud.crud_book.attach_tag_to_book(db=db, book_id=book_id, tag_id=tag_id)
+
+
+@router.delete("/{book_id}/tags/{tag_id}/", status_code=status.HTTP_204_NO_CONTENT)
+async def detach_tag(db: Annotated[AsyncSession, Depends(get_db)], book_id: int, tag_id: int):
+    await crud.crud_book.detach_tag_from_book(db=db, book_id=book_id, tag_id=tag_id)
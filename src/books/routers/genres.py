@@ -1,25 +1,46 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.books import schemas, crud
-from src.dependencies import get_db
+from src.cache import response_cache
+from src.deadlines import DeadlineRoute
+from src.dependencies import get_db, get_read_db
+from src.responses import ModelResponse, model_response
 
-router = APIRouter(prefix="/genres", tags=["genres"])
+router = APIRouter(prefix="/genres", tags=["genres"], route_class=DeadlineRoute)
+
+genres_adapter = TypeAdapter(list[schemas.Genre])
+genre_book_adapter = TypeAdapter(schemas.GenreBook)
 
 
 @router.get("/", response_model=list[schemas.Genre])
-async def get_genres(db: Annotated[AsyncSession, Depends(get_db)]):
-    return await crud.crud_genre.get_genres(db)
+async def get_genres(db: Annotated[AsyncSession, Depends(get_read_db)]):
+    # Reference data: cached until a genre is created, changed or deleted.
+    if (body := await response_cache.get("genres")) is not None:
+        return ModelResponse(body)
+    generation = await response_cache.generation()
+    response = model_response(genres_adapter, await crud.crud_genre.get_genres(db))
+    await response_cache.set("genres", response.body, ["genres"], generation)
+    return response
 
 
 @router.get("/{genre_id}/", response_model=schemas.Genre)
-async def get_genre(genre_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_genre(genre_id: int, db: Annotated[AsyncSession, Depends(get_read_db)]):
     return await crud.crud_genre.get_genre(db=db, genre_id=genre_id)
 
 
 @router.get("/genres/{genre_id}/with_books/", response_model=schemas.GenreBook)
-async def get_genre_with_books(genre_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
-    return await crud.crud_genre.get_genre_with_books(db=db, genre_id=genre_id)
+async def get_genre_with_books(
+    genre_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    sort: schemas.BookSort = "-date_published",
+):
+    genre, books = await crud.crud_genre.get_genre_with_books(db, genre_id, limit, offset, sort)
+    content = {"id": genre.id, "name": genre.name, "book_count": genre.book_count, "books": books}
+    return model_response(genre_book_adapter, content)
 
 
 @router.post("/", response_model=schemas.Genre, status_code=status.HTTP_201_CREATED)
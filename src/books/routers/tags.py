@@ -1,21 +1,42 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.books import schemas, crud
-from src.dependencies import get_db
+from src.cache import response_cache
+from src.deadlines import DeadlineRoute
+from src.dependencies import get_db, get_read_db
+from src.responses import ModelResponse, model_response
 
-router = APIRouter(prefix="/tags", tags=["tags"])
+router = APIRouter(prefix="/tags", tags=["tags"], route_class=DeadlineRoute)
+
+tags_adapter = TypeAdapter(list[schemas.Tag])
+popular_tags_adapter = TypeAdapter(list[schemas.PopularTag])
 
 
 @router.get("/", response_model=list[schemas.Tag])
-async def get_tags(db: Annotated[AsyncSession, Depends(get_db)]):
-    return await crud.crud_tag.get_all_tags(db)
+async def get_tags(db: Annotated[AsyncSession, Depends(get_read_db)]):
+    # Reference data: cached until a tag is created, changed or deleted.
+    if (body := await response_cache.get("tags")) is not None:
+        return ModelResponse(body)
+    generation = await response_cache.generation()
+    response = model_response(tags_adapter, await crud.crud_tag.get_all_tags(db))
+    await response_cache.set("tags", response.body, ["tags"], generation)
+    return response
+
+
+# Declared before /{tag_id}/ so "popular" isn't taken for a tag id.
+@router.get("/popular/", response_model=list[schemas.PopularTag])
+async def get_popular_tags(
+    db: Annotated[AsyncSession, Depends(get_read_db)], limit: Annotated[int, Query(ge=1, le=100)] = 20
+):
+    return model_response(popular_tags_adapter, await crud.crud_tag.get_popular_tags(db, limit))
 
 
 @router.get("/{tag_id}/", response_model=schemas.Tag)
-async def get_tag(tag_id: int, db: Annotated[AsyncSession, Depends(get_db)]):
+async def get_tag(tag_id: int, db: Annotated[AsyncSession, Depends(get_read_db)]):
     return await crud.crud_tag.get_tag_by_id(db=db, tag_id=tag_id)
 
 
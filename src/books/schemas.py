@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Literal, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -24,6 +24,10 @@ class Tag(TagBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PopularTag(Tag):
+    usage_count: int
+
+
 class GenreBase(BaseModel):
     name: Annotated[str, Field(min_length=1, max_length=50)]
 
@@ -66,6 +70,7 @@ class BookUpdate(BaseModel):
 class Book(BookBase):
     id: int
     image_path: str
+    image_variants: dict[str, str]
     genre: Genre | None
     author: AuthorPublic | None
 
@@ -79,10 +84,16 @@ class BookWithTags(Book):
 class BookAuthor(BookBase):
     id: int
     image_path: str
+    image_variants: dict[str, str]
     author: AuthorPublic | None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+# A field name, prefixed with "-" for descending order.
+BookSort = Literal["title", "-title", "date_published", "-date_published", "rating", "-rating"]
+
+
 class GenreBook(Genre):
+    book_count: int
     books: list[BookAuthor]
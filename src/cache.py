@@ -0,0 +1,209 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Protocol
+
+from src.config import settings
+from src.observability.metrics import registry
+
+try:
+    from redis import asyncio as redis
+except ImportError:  # optional: pip install "fast-library[redis]"
+    redis = None
+
+cache_requests = registry.counter("response_cache_requests_total", "Response cache lookups.", ("result",))
+cache_invalidations = registry.counter("response_cache_invalidations_total", "Response cache tag invalidations.")
+cache_bytes = registry.gauge("response_cache_bytes", "Bytes held by the in-memory response cache.")
+cache_entries = registry.gauge("response_cache_entries", "Entries held by the in-memory response cache.")
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def generation(self) -> int: ...
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str], generation: int) -> None: ...
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None: ...
+
+
+class MemoryBackend:
+    """Per-process LRU bounded by the total size of the cached bodies.
+
+    Invalidations only reach the process that made the change, so entries also expire after `ttl` seconds:
+    that bounds how long another process serving the same database (a second worker) can return a stale
+    body. Any invalidation makes set() drop bodies loaded before it."""
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.invalidations = 0
+        self.size = 0
+        self.entries: OrderedDict[str, tuple[bytes, frozenset[str], float]] = OrderedDict()
+        self.keys_by_tag: dict[str, set[str]] = {}
+        registry.add_collector(self.collect)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            self.discard(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    async def generation(self) -> int:
+        return self.invalidations
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str], generation: int) -> None:
+        if generation != self.invalidations or len(value) > self.max_bytes:
+            return
+        self.discard(key)
+        tags = frozenset(tags)
+        self.entries[key] = (value, tags, time.monotonic() + self.ttl)
+        self.size += len(value)
+        for tag in tags:
+            self.keys_by_tag.setdefault(tag, set()).add(key)
+        while self.size > self.max_bytes:
+            self.discard(next(iter(self.entries)))
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        self.invalidations += 1
+        for tag in tags:
+            for key in self.keys_by_tag.pop(tag, set()):
+                self.discard(key)
+
+    def discard(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        value, tags, _ = entry
+        self.size -= len(value)
+        for tag in tags:
+            keys = self.keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keys_by_tag[tag]
+
+    def collect(self) -> None:
+        cache_bytes.set(value=self.size)
+        cache_entries.set(value=len(self.entries))
+
+
+# KEYS: the entry, then each tag's key set and version; ARGV: the reader's generation, the body, the ttl.
+# Stores nothing if one of the tags was invalidated after the reader took its generation.
+SET_SCRIPT = """
+for i = 2, #KEYS, 2 do
+    if tonumber(redis.call("GET", KEYS[i + 1]) or "0") > tonumber(ARGV[1]) then
+        return 0
+    end
+end
+redis.call("SET", KEYS[1], ARGV[2], "EX", ARGV[3])
+for i = 2, #KEYS, 2 do
+    redis.call("SADD", KEYS[i], KEYS[1])
+    redis.call("EXPIRE", KEYS[i], ARGV[3])
+end
+return 1
+"""
+
+# KEYS: the generation counter, then each tag's key set and version; ARGV: the ttl.
+INVALIDATE_SCRIPT = """
+local generation = redis.call("INCR", KEYS[1])
+for i = 2, #KEYS, 2 do
+    local keys = redis.call("SMEMBERS", KEYS[i])
+    for first = 1, #keys, 1000 do
+        redis.call("DEL", unpack(keys, first, math.min(first + 999, #keys)))
+    end
+    redis.call("DEL", KEYS[i])
+    redis.call("SET", KEYS[i + 1], generation, "EX", ARGV[1])
+end
+return generation
+"""
+
+
+class RedisBackend:
+    """Cache shared by all workers. Each tag is a Redis set of the keys that depend on it; entries expire
+    after `ttl` seconds and the server's maxmemory policy bounds the total size.
+
+    Invalidating bumps a shared generation counter and stamps each tag with it. A reader takes the counter
+    before loading, and set() stores its body only if none of the body's tags was stamped later, so a worker
+    can't store rows another worker has since changed. Both run as Lua scripts: a set() can't land between an
+    invalidation reading a tag's keys and deleting them."""
+
+    def __init__(self, url: str, ttl: int, prefix: str = "response-cache:") -> None:
+        if redis is None:
+            raise RuntimeError("response_cache_redis_url is set but the redis package is not installed")
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.set_script = self.client.register_script(SET_SCRIPT)
+        self.invalidate_script = self.client.register_script(INVALIDATE_SCRIPT)
+
+    def tag_keys(self, tags: Iterable[str]) -> list[str]:
+        return [key for tag in tags for key in (f"{self.prefix}tag:{tag}", f"{self.prefix}version:{tag}")]
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(self.prefix + key)
+
+    async def generation(self) -> int:
+        return int(await self.client.get(f"{self.prefix}generation") or 0)
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str], generation: int) -> None:
+        await self.set_script(keys=[self.prefix + key, *self.tag_keys(tags)], args=[generation, value, self.ttl])
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        tag_keys = self.tag_keys(tags)
+        if not tag_keys:
+            return
+        await self.invalidate_script(keys=[f"{self.prefix}generation", *tag_keys], args=[self.ttl])
+
+
+class ResponseCache:
+    """Encoded response bodies keyed by resource, dropped by tag when anything they were built from changes.
+
+    A reader takes `generation()` before loading and passes it to set(), which skips storing a body loaded
+    before an invalidation it raced with. With read replicas, a read served just after an invalidation may
+    still see the old rows and cache them again, so invalidations are repeated once the replicas have had
+    time to catch up."""
+
+    def __init__(self, backend: CacheBackend, replay_after: float | None = None) -> None:
+        self.backend = backend
+        self.replay_after = replay_after
+        self.pending: set[asyncio.Task] = set()
+
+    async def get(self, key: str) -> bytes | None:
+        value = await self.backend.get(key)
+        cache_requests.inc("hit" if value is not None else "miss")
+        return value
+
+    async def generation(self) -> int:
+        return await self.backend.generation()
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str], generation: int) -> None:
+        await self.backend.set(key, value, tags, generation)
+
+    async def invalidate(self, *tags: str) -> None:
+        cache_invalidations.inc(amount=len(tags))
+        await self.backend.invalidate_tags(tags)
+        if self.replay_after:
+            task = asyncio.create_task(self.replay(tags))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+    async def replay(self, tags: tuple[str, ...]) -> None:
+        await asyncio.sleep(self.replay_after)
+        await self.backend.invalidate_tags(tags)
+
+
+def build_backend() -> CacheBackend:
+    if settings.response_cache_redis_url:
+        return RedisBackend(settings.response_cache_redis_url, settings.response_cache_ttl)
+    return MemoryBackend(settings.response_cache_max_bytes, settings.response_cache_memory_ttl)
+
+
+response_cache = ResponseCache(
+    build_backend(), replay_after=settings.DB_REPLICA_MAX_LAG_SECONDS if settings.DB_REPLICA_URLS else None
+)
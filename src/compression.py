@@ -0,0 +1,207 @@
+import gzip
+import zlib
+from collections.abc import Callable
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: pip install "fast-library[compression]"
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install "fast-library[compression]"
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+COMPRESSIBLE_SUFFIXES = ("+json", "+xml")
+
+# Levels per content type prefix and encoding: JSON API responses favour speed, static text favours ratio.
+DEFAULT_LEVELS: dict[str, dict[str, int]] = {
+    "application/json": {"zstd": 3, "br": 4, "gzip": 5},
+    "": {"zstd": 9, "br": 6, "gzip": 6},
+}
+
+
+class StreamCompressor:
+    def __init__(self, compress: Callable[[bytes], bytes], finish: Callable[[], bytes]) -> None:
+        self.compress = compress
+        self.finish = finish
+
+
+def _gzip_stream(level: int) -> StreamCompressor:
+    compressor = zlib.compressobj(level, wbits=31)
+    return StreamCompressor(
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    )
+
+
+def _brotli_stream(level: int) -> StreamCompressor:
+    compressor = brotli.Compressor(quality=level)
+    return StreamCompressor(lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish)
+
+
+def _zstd_stream(level: int) -> StreamCompressor:
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return StreamCompressor(
+        lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+# encoding -> (one-shot compress, streaming compressor factory), in server preference order.
+ENCODERS: dict[str, tuple[Callable[[bytes, int], bytes], Callable[[int], StreamCompressor]]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), _zstd_stream)
+if brotli is not None:
+    ENCODERS["br"] = (lambda data, level: brotli.compress(data, quality=level), _brotli_stream)
+ENCODERS["gzip"] = (lambda data, level: gzip.compress(data, compresslevel=level, mtime=0), _gzip_stream)
+
+
+def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def is_accepted(accepted: dict[str, float], encoding: str) -> bool:
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    accepted = accepted_encodings(accept_encoding)
+    return next((encoding for encoding in ENCODERS if is_accepted(accepted, encoding)), None)
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+class CompressionMiddleware:
+    """Negotiate zstd, brotli or gzip for compressible responses of at least `minimum_size` bytes.
+
+    Single-body responses are compressed in one shot (in a worker thread above `offload_size`); streamed
+    responses are compressed chunk by chunk and flushed so clients keep receiving data. Responses that
+    already carry a Content-Encoding (e.g. precompressed static files), partial content and file responses
+    sent through the pathsend extension are passed through untouched."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        offload_size: int = 256 * 1024,
+        levels: dict[str, dict[str, int]] = DEFAULT_LEVELS,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.levels = levels
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self, encoding, send)(scope, receive)
+
+    def level_for(self, content_type: str, encoding: str) -> int:
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        best = max((prefix for prefix in self.levels if media_type.startswith(prefix)), key=len)
+        return self.levels[best][encoding]
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Message | None = None
+        self.level = 0
+        self.stream: StreamCompressor | None = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or message["status"] < 200
+                or message["status"] in (204, 206, 304)
+                or not is_compressible(content_type)
+            ):
+                self.passthrough = True
+                await self.send(message)
+                return
+            self.start_message = message
+            self.level = self.middleware.level_for(content_type, self.encoding)
+            return
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message_type != "http.response.body":
+            # e.g. http.response.pathsend: let the server send the file as is.
+            await self.flush_start(compressed=False)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is None and self.start_message is not None:
+            if not more_body:
+                await self.send_single(body)
+                return
+            self.stream = ENCODERS[self.encoding][1](self.level)
+            await self.flush_start(compressed=True, content_length=None)
+
+        chunk = await self.run(self.stream.compress, body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def send_single(self, body: bytes) -> None:
+        if len(body) < self.middleware.minimum_size:
+            await self.flush_start(compressed=False)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+        compress = ENCODERS[self.encoding][0]
+        compressed = await self.run(lambda data: compress(data, self.level), body)
+        await self.flush_start(compressed=True, content_length=len(compressed))
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    async def run(self, func: Callable[[bytes], bytes], data: bytes) -> bytes:
+        if len(data) >= self.middleware.offload_size:
+            return await anyio.to_thread.run_sync(func, data)
+        return func(data)
+
+    async def flush_start(self, compressed: bool, content_length: int | None = None) -> None:
+        message, self.start_message = self.start_message, None
+        headers = MutableHeaders(scope=message)
+        headers.add_vary_header("Accept-Encoding")
+        if compressed:
+            headers["Content-Encoding"] = self.encoding
+            if content_length is None:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(content_length)
+        await self.send(message)
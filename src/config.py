@@ -23,12 +23,82 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
     ECHO: bool
+    # psycopg prepares a statement server-side once it has run this many times on a connection; None disables.
+    # psycopg's own default: the hot statements get there quickly, one-off statements don't fill its cache.
+    DB_PREPARE_THRESHOLD: int | None = 5
+    # Full SQLAlchemy URLs of streaming replicas used for read-only endpoints.
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 2.0
     auth_jwt: AuthJWT = AuthJWT()  # for learning purpose
 
     secret_key: SecretStr
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    # Per-request deadlines in seconds, keyed by "METHOD /route/template/"; clients may send X-Request-Timeout
+    # to pick another deadline up to max_request_timeout.
+    request_timeout: float = 30.0
+    request_timeouts: dict[str, float] = {"GET /books/": 5.0, "GET /orders/": 5.0}
+    max_request_timeout: float = 60.0
+
+    # Production server (src/server.py): one worker per available CPU unless server_workers is set. Each
+    # worker warms its pools, prepared statements and reference-data caches before taking traffic.
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int | None = None
+    server_forwarded_allow_ips: str = "127.0.0.1"
+    server_keep_alive: int = 5
+    server_graceful_shutdown: int = 30
+    startup_warmup: bool = True
+
+    # Seconds between recomputations of the maintained genre book counts and tag usage counts; 0 disables.
+    counter_reconcile_interval: float = 3600.0
+
+    # "Customers also ordered": related books kept per book by the book_relations rebuild (and the most
+    # GET /books/{id}/related/ returns), and seconds between rebuilds from the full order history (0 disables;
+    # add_order keeps it current in between).
+    book_relations_top_k: int = 20
+    book_relations_rebuild_interval: float = 24 * 3600.0
+
+    # Learning-purpose routes under /demo-auth/ (basic, header, cookie and JWT auth demos); deployments that
+    # don't want them switch this off, which also keeps their modules from being imported.
+    demo_routers: bool = True
+
+    # Warn when a request runs the same statement shape more than this many times.
+    n_plus_one_threshold: int = 10
+
+    # Statements slower than this many seconds go to the slow-query log (GET /admin/slow-queries/); a
+    # sampled share of them get their EXPLAIN plan captured.
+    slow_query_threshold: float = 0.2
+    slow_query_explain_rate: float = 0.1
+    slow_query_log_size: int = 200
+
+    # Responses smaller than this go out uncompressed; larger ones are compressed in a worker thread.
+    compression_minimum_size: int = 1024
+    compression_offload_size: int = 256 * 1024
+
+    # Shed requests above adaptive per-route-group concurrency limits (src/limiter.py).
+    concurrency_limiting: bool = True
+
+    # Request profiling with pyinstrument: requests sending `X-Profile: <profiling_token>` and a random
+    # profiling_sample_rate share of all requests. Nothing is installed unless profiling_enabled is set.
+    profiling_enabled: bool = False
+    profiling_token: str | None = None
+    profiling_sample_rate: float = 0.0
+    profiling_interval: float = 0.001
+
+    # Image uploads: size cap, and worker processes generating thumbnail/WebP variants.
+    media_max_upload_bytes: int = 10 * 1024 * 1024
+    media_workers: int = 2
+
+    # Encoded GET /books/{id}/ bodies: a per-process LRU capped at max_bytes whose entries expire after
+    # memory_ttl seconds, or Redis shared by all workers (entries expire after ttl seconds).
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    response_cache_memory_ttl: float = 30.0
+    response_cache_redis_url: str | None = None
+    response_cache_ttl: int = 3600
+
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql+psycopg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
@@ -1,7 +1,100 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import asyncio
+import itertools
+from functools import wraps
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from src.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.ECHO)
+engine = create_async_engine(
+    settings.DATABASE_URL, echo=settings.ECHO, connect_args={"prepare_threshold": settings.DB_PREPARE_THRESHOLD}
+)
 
 # Prevent attribute expiration on commit to avoid async lazy-loads in response serialization.
 AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
+
+
+def release_connection(func):
+    """End the session's transaction as soon as a read returns, so its connection goes back to the pool
+    before the response is serialized instead of when the request's session closes. Loaded objects stay
+    usable because expire_on_commit is off; a failed read rolls back instead."""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        db = next(arg for arg in (*args, *kwargs.values()) if isinstance(arg, AsyncSession))
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            await db.rollback()
+            raise
+        await db.commit()
+        return result
+
+    return wrapper
+
+
+# Seconds since the last replayed transaction, or 0 when the replica has replayed everything it received
+# (an idle primary would otherwise look like an ever-growing lag). A non-replica server always reports 0.
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    def __init__(self, url: str) -> None:
+        self.engine = create_async_engine(
+            url, echo=settings.ECHO, connect_args={"prepare_threshold": settings.DB_PREPARE_THRESHOLD}
+        )
+        self.session_factory = async_sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine, expire_on_commit=False
+        )
+        self.lag: float = 0.0
+        # Reads go to the primary until the first probe finds the replica up.
+        self.healthy: bool = False
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and self.lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+
+    async def refresh_lag(self) -> None:
+        try:
+            async with asyncio.timeout(settings.DB_REPLICA_LAG_CHECK_INTERVAL):
+                async with self.engine.connect() as conn:
+                    self.lag = float(await conn.scalar(REPLICA_LAG_QUERY) or 0)
+        except (SQLAlchemyError, OSError, TimeoutError):
+            self.healthy = False
+        else:
+            self.healthy = True
+
+
+class ReplicaRouter:
+    """Round-robin over the configured replicas, skipping those that are down or lag too far behind.
+
+    Health and lag come from monitor_lag, which the app lifespan runs in the background; routing a request
+    only reads them, so a replica that stops answering never holds up a request or makes a cache hit wait."""
+
+    def __init__(self, urls: list[str]) -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self._cycle = itertools.cycle(self.replicas)
+
+    def session_factory(self) -> async_sessionmaker:
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.available:
+                return replica.session_factory
+        return AsyncSessionLocal
+
+    async def monitor_lag(self) -> None:
+        """Probe every replica each DB_REPLICA_LAG_CHECK_INTERVAL seconds, for as long as the app runs."""
+        while True:
+            await asyncio.gather(*(replica.refresh_lag() for replica in self.replicas))
+            await asyncio.sleep(settings.DB_REPLICA_LAG_CHECK_INTERVAL)
+
+
+replica_router = ReplicaRouter(settings.DB_REPLICA_URLS)
+
+
+def all_engines() -> dict[str, AsyncEngine]:
+    return {"primary": engine, **{f"replica-{i}": replica.engine for i, replica in enumerate(replica_router.replicas)}}
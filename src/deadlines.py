@@ -0,0 +1,70 @@
+import asyncio
+import time
+from collections.abc import Callable, Coroutine
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.config import settings
+
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+# Monotonic time at which the current request's deadline expires.
+request_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def remaining_time() -> float | None:
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@event.listens_for(Session, "after_begin")
+def set_statement_timeout(session, transaction, connection) -> None:
+    # Every transaction a request starts gets whatever is left of its deadline, so the server cancels the
+    # query itself instead of holding the connection after the client has gone.
+    remaining = remaining_time()
+    if remaining is not None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(int(remaining * 1000), 1)}")
+
+
+class DeadlineRoute(APIRoute):
+    """Route that runs its handler, dependencies included, under the route's deadline and answers 503 when
+    it expires."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        route_timeout = min(
+            (
+                settings.request_timeouts.get(f"{method} {self.path}", settings.request_timeout)
+                for method in self.methods
+            ),
+            default=settings.request_timeout,
+        )
+
+        async def handler_with_deadline(request: Request) -> Response:
+            timeout = route_timeout
+            if header := request.headers.get(REQUEST_TIMEOUT_HEADER):
+                try:
+                    timeout = min(max(float(header), 0.001), settings.max_request_timeout)
+                except ValueError:
+                    pass
+            token = request_deadline.set(time.monotonic() + timeout)
+            deadline = asyncio.timeout(timeout)
+            try:
+                async with deadline:
+                    return await handler(request)
+            except TimeoutError:
+                if not deadline.expired():
+                    raise
+                return JSONResponse(
+                    {"detail": "Request deadline exceeded"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            finally:
+                request_deadline.reset(token)
+
+        return handler_with_deadline
@@ -1,16 +1,22 @@
+from functools import cache
+
 from src.auth import utils as auth_utils
 from src.authors.schemas import UserSchema
 
-john = UserSchema(
-    username="john",
-    password=auth_utils.hash_password("qwerty"),
-    email="john@example.com",
-)
-sam = UserSchema(
-    username="sam",
-    password=auth_utils.hash_password("secret"),
-)
-users_db: dict[str, UserSchema] = {
-    john.username: john,
-    sam.username: sam,
-}
+
+@cache
+def get_users_db() -> dict[str, UserSchema]:
+    # Built on first use: hashing the demo passwords at import would add bcrypt work to every worker boot.
+    john = UserSchema(
+        username="john",
+        password=auth_utils.hash_password("qwerty"),
+        email="john@example.com",
+    )
+    sam = UserSchema(
+        username="sam",
+        password=auth_utils.hash_password("secret"),
+    )
+    return {
+        john.username: john,
+        sam.username: sam,
+    }
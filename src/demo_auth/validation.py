@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt import InvalidTokenError
 from starlette import status
 
-from src.demo_auth.crud import users_db
+from src.demo_auth.crud import get_users_db
 from src.demo_auth.helpers import (
     TOKEN_TYPE_FIELD,
     ACCESS_TOKEN_TYPE,
@@ -47,7 +47,7 @@ def validate_token_type(
 
 def get_user_by_token_sub(payload: dict) -> UserSchema:
     username: str | None = payload.get("sub")
-    if user := users_db.get(username):
+    if user := get_users_db().get(username):
         return user
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -102,7 +102,7 @@ def validate_auth_user(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="invalid username or password",
     )
-    if not (user := users_db.get(username)):
+    if not (user := get_users_db().get(username)):
         raise unauthed_exc
 
     if not auth_utils.validate_password(
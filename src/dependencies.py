@@ -1,8 +1,33 @@
+import math
 from typing import AsyncGenerator
+
+from fastapi import Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.database import AsyncSessionLocal
+from src.config import settings
+from src.database import AsyncSessionLocal, replica_router
+
+# Send "X-DB-Consistency: primary" to force a read-only endpoint onto the primary.
+DB_CONSISTENCY_HEADER = "X-DB-Consistency"
+# Set after a write so the same client keeps reading from the primary until replicas catch up.
+DB_LAST_WRITE_COOKIE = "db-last-write"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
+    """The session checks out a connection only when its first statement runs, so handlers that answer
+    from a cache never touch the pool; see release_connection for returning it early."""
+    if replica_router.replicas and request.method not in SAFE_METHODS:
+        max_age = math.ceil(settings.DB_REPLICA_MAX_LAG_SECONDS + settings.DB_REPLICA_LAG_CHECK_INTERVAL)
+        response.set_cookie(DB_LAST_WRITE_COOKIE, "1", max_age=max_age, httponly=True, samesite="lax")
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints, served by a replica when one is healthy and fresh enough."""
+    if request.headers.get(DB_CONSISTENCY_HEADER) == "primary" or DB_LAST_WRITE_COOKIE in request.cookies:
+        session_factory = AsyncSessionLocal
+    else:
+        session_factory = replica_router.session_factory()
+    async with session_factory() as session:
+        yield session
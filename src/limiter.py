@@ -0,0 +1,199 @@
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.observability.metrics import registry
+
+concurrency_limit = registry.gauge("concurrency_limit", "Current adaptive concurrency limit.", ("group",))
+concurrency_in_flight = registry.gauge("concurrency_in_flight", "Requests admitted and not finished.", ("group",))
+requests_shed = registry.counter("requests_shed_total", "Requests rejected with 503 by the limiter.", ("group",))
+
+
+@dataclass(frozen=True)
+class RouteGroup:
+    name: str
+    methods: frozenset[str]
+    prefixes: tuple[str, ...]
+    # Higher priority groups may queue for up to max_wait seconds; while they have requests queued, lower
+    # priority groups are shed outright, since all groups compete for the same database pool.
+    priority: int
+    max_wait: float
+    initial_limit: int
+    min_limit: int = 2
+    max_limit: int = 200
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and path.startswith(self.prefixes)
+
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+ROUTE_GROUPS = (
+    RouteGroup("order_write", WRITE_METHODS, ("/orders/",), priority=2, max_wait=1.0, initial_limit=20),
+    # Sign-up and login spend most of their time hashing passwords in the thread pool (or, for the demo
+    # routes, in sync dependencies that FastAPI also runs there); the limit keeps them from taking all of it.
+    RouteGroup(
+        "auth",
+        frozenset({"POST"}),
+        ("/authors/", "/demo-auth/"),
+        priority=1,
+        max_wait=0.2,
+        initial_limit=8,
+    ),
+    RouteGroup(
+        "catalog_read",
+        frozenset({"GET", "HEAD"}),
+        ("/books/", "/genres/", "/tags/", "/authors/", "/profiles/"),
+        priority=0,
+        max_wait=0.0,
+        initial_limit=50,
+    ),
+)
+
+
+class GradientLimit:
+    """Gradient2-style limit: grows while a short-term latency average stays within `tolerance` of the
+    long-term baseline and shrinks in proportion as it inflates. Timeouts and errors back off
+    multiplicatively, like AIMD."""
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        smoothing: float = 0.2,
+        tolerance: float = 1.5,
+        backoff: float = 0.9,
+        short_window: int = 10,
+        long_window: int = 600,
+    ) -> None:
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.short_window = short_window
+        self.long_window = long_window
+        self.short_rtt: float | None = None
+        self.long_rtt: float | None = None
+
+    def update(self, rtt: float, in_flight: int, dropped: bool) -> None:
+        if dropped:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            return
+        if self.long_rtt is None:
+            self.short_rtt = self.long_rtt = rtt
+            return
+        self.short_rtt += (rtt - self.short_rtt) / self.short_window
+        self.long_rtt += (rtt - self.long_rtt) / self.long_window
+        if self.long_rtt / self.short_rtt > 2:
+            # Latency recovered well below the baseline (e.g. after an incident): let the baseline follow.
+            self.long_rtt *= 0.95
+        if in_flight < self.limit / 2:
+            return  # not limited by concurrency: latency says nothing about a higher limit
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        new_limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, new_limit))
+
+
+class GroupLimiter:
+    def __init__(self, group: RouteGroup) -> None:
+        self.group = group
+        self.limit = GradientLimit(group.initial_limit, group.min_limit, group.max_limit)
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self, yield_to_higher: bool) -> bool:
+        if yield_to_higher:
+            return False
+        if self.in_flight < self.limit.limit and not self.waiters:
+            self.in_flight += 1
+            return True
+        if self.group.max_wait <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            async with asyncio.timeout(self.group.max_wait):
+                await waiter
+        except TimeoutError:
+            # release() may have handed over its slot just as the timeout fired.
+            return waiter.done() and not waiter.cancelled()
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.free_slot()
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+        return True
+
+    def release(self, rtt: float, dropped: bool) -> None:
+        self.limit.update(rtt, self.in_flight, dropped)
+        self.free_slot()
+
+    def free_slot(self) -> None:
+        # Hand the slot straight to the oldest waiter, unless the limit just shrank below it.
+        while self.waiters and self.in_flight <= self.limit.limit:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def collect(self) -> None:
+        concurrency_limit.set(self.group.name, value=round(self.limit.limit, 2))
+        concurrency_in_flight.set(self.group.name, value=self.in_flight)
+
+
+class ConcurrencyLimitMiddleware:
+    """Admit requests per route group up to an adaptive concurrency limit and shed the rest with a 503
+    before they queue on the database pool. Requests outside every group are not limited."""
+
+    def __init__(self, app: ASGIApp, groups: tuple[RouteGroup, ...] = ROUTE_GROUPS) -> None:
+        self.app = app
+        self.limiters = [GroupLimiter(group) for group in sorted(groups, key=lambda group: -group.priority)]
+        for limiter in self.limiters:
+            registry.add_collector(limiter.collect)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiter = next(
+            (limiter for limiter in self.limiters if limiter.group.matches(scope["method"], scope["path"])), None
+        )
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        yield_to_higher = any(other.waiters for other in self.limiters if other.group.priority > limiter.group.priority)
+        if not await limiter.acquire(yield_to_higher):
+            requests_shed.inc(limiter.group.name)
+            response = JSONResponse(
+                {"detail": "Server overloaded, retry later"}, status_code=503, headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # 503s include requests that ran out of deadline: a sign of overload, not a latency sample.
+            limiter.release(time.perf_counter() - started, dropped=status_code >= 500)
@@ -1,24 +1,89 @@
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
+from src.books.maintenance import rebuild_book_relations, reconcile_counters, run_periodically
 from src.books.routers import genres_router, books_router, tags_router
 from src.orders.router import router as orders_router
-from src.demo_auth.views import router as demo_auth_router
 from src.authors.routers import authors_router, profiles_router
+from src.compression import CompressionMiddleware
+from src.config import settings
+from src.database import all_engines, replica_router
+from src.limiter import ConcurrencyLimitMiddleware
+from src.media.storage import shutdown_process_pool
+from src.observability.metrics import MetricsMiddleware, monitor_event_loop_lag, observe_query, register_pool_collector
+from src.observability.profiling import ProfilerMiddleware
+from src.observability.queries import QueryStatsMiddleware, add_query_observer, instrument_engine
+from src.observability.router import router as observability_router
+from src.observability.slow_queries import slow_query_log
+from src.staticfiles import CachedStaticFiles
+from src.warmup import dispose_engines, warm_up
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
-app = FastAPI()
-app.mount("/media", StaticFiles(directory=BASE_DIR / "media"), name="media")
-app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
+for db_engine in all_engines().values():
+    instrument_engine(db_engine)
+add_query_observer(observe_query)
+add_query_observer(slow_query_log)
+register_pool_collector(all_engines())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.startup_warmup:
+        await warm_up()
+    jobs = [monitor_event_loop_lag()]
+    if replica_router.replicas:
+        jobs.append(replica_router.monitor_lag())
+    if settings.counter_reconcile_interval > 0:
+        jobs.append(run_periodically(settings.counter_reconcile_interval, reconcile_counters))
+    if settings.book_relations_rebuild_interval > 0:
+        jobs.append(
+            run_periodically(
+                settings.book_relations_rebuild_interval, rebuild_book_relations, settings.book_relations_top_k
+            )
+        )
+    tasks = [asyncio.create_task(job) for job in jobs]
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)  # periodic jobs give up their locks first
+    shutdown_process_pool()
+    await dispose_engines()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    offload_size=settings.compression_offload_size,
+)
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilerMiddleware,
+        token=settings.profiling_token,
+        sample_rate=settings.profiling_sample_rate,
+        interval=settings.profiling_interval,
+    )
+app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=settings.n_plus_one_threshold)
+if settings.concurrency_limiting:
+    app.add_middleware(ConcurrencyLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.mount("/media", CachedStaticFiles(directory=BASE_DIR / "media"), name="media")
+app.mount("/static", CachedStaticFiles(directory=BASE_DIR / "static"), name="static")
 app.include_router(genres_router)
 app.include_router(books_router)
 app.include_router(orders_router)
-app.include_router(demo_auth_router)
+if settings.demo_routers:
+    from src.demo_auth.views import router as demo_auth_router
+
+    app.include_router(demo_auth_router)
 app.include_router(authors_router)
 app.include_router(tags_router)
 app.include_router(profiles_router)
+app.include_router(observability_router)
 
 
 @app.get("/")
@@ -0,0 +1,59 @@
+"""Image variants. Runs in worker processes: keep imports light and free of app state."""
+
+import os
+import re
+import tempfile
+from pathlib import Path
+
+# name -> (longest side in pixels or None for full size, Pillow format, suffix replacing the extension)
+VARIANTS: dict[str, tuple[int | None, str, str]] = {
+    "thumbnail": (256, "JPEG", "thumbnail.jpg"),
+    "thumbnail_webp": (256, "WEBP", "thumbnail.webp"),
+    "webp": (None, "WEBP", "webp"),
+}
+
+CONTENT_HASH_NAME = re.compile(r"^[0-9a-f]{64}\.[a-z]+$")
+
+
+def variant_name(image_file: str, variant: str) -> str:
+    _, _, suffix = VARIANTS[variant]
+    return f"{image_file.split('.', 1)[0]}.{suffix}"
+
+
+def verify_image(source: str) -> None:
+    """Raise unless `source` decodes as a whole image: verify() checks the structure (PNG checksums
+    included), and load() decodes the pixels, which catches truncated files verify() lets through."""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.verify()
+    with Image.open(source) as image:
+        image.load()
+
+
+def generate_variants(source: str, staging_dir: str) -> list[str]:
+    from PIL import Image, ImageOps
+
+    path = Path(source)
+    created = []
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        for variant, (max_side, image_format, _) in VARIANTS.items():
+            target = path.with_name(variant_name(path.name, variant))
+            if target.exists():  # same content, same name: generated by an earlier upload
+                continue
+            resized = image.copy()
+            if max_side:
+                resized.thumbnail((max_side, max_side))
+            if image_format == "JPEG" and resized.mode not in ("RGB", "L"):
+                resized = resized.convert("RGB")
+            fd, partial = tempfile.mkstemp(dir=staging_dir, suffix=".part")  # outside the served directory
+            os.close(fd)
+            try:
+                resized.save(partial, image_format, quality=82)
+                os.replace(partial, target)
+            except BaseException:
+                Path(partial).unlink(missing_ok=True)
+                raise
+            created.append(target.name)
+    return created
@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+from collections.abc import AsyncIterator, Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import anyio
+from fastapi import HTTPException, status
+
+from src.cache import response_cache
+from src.config import BASE_DIR, settings
+from src.media.images import CONTENT_HASH_NAME, VARIANTS, generate_variants, variant_name, verify_image
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = BASE_DIR / "media"
+# Partially written files live here: outside MEDIA_ROOT so they are never served, and next to it so moving a
+# finished file into place is an atomic rename on the same filesystem.
+STAGING_ROOT = BASE_DIR / "media-staging"
+
+# Leading bytes of the image formats we accept -> stored extension.
+SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"image/*": {"schema": {"type": "string", "format": "binary"}}},
+    }
+}
+
+_process_pool: ProcessPoolExecutor | None = None
+# Variant files seen on disk. Nothing removes them, so a name found once isn't looked up again.
+_existing_variants: set[str] = set()
+
+
+def image_extension(head: bytes) -> str:
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, extension in SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Expected a JPEG, PNG, GIF or WebP image"
+    )
+
+
+async def save_upload(chunks: AsyncIterator[bytes], directory: str) -> Path:
+    """Stream an image to MEDIA_ROOT/directory chunk by chunk and store it as <sha256>.<ext>, so the same
+    content always gets the same (permanently cacheable) name. The leading bytes reject other formats early;
+    the whole file is decoded in the process pool before it is stored."""
+    target_dir = MEDIA_ROOT / directory
+    target_dir.mkdir(parents=True, exist_ok=True)
+    STAGING_ROOT.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=STAGING_ROOT, suffix=".part")
+    os.close(fd)
+    digest = hashlib.sha256()
+    head = b""
+    extension = None
+    size = 0
+    try:
+        async with await anyio.open_file(partial, "wb") as file:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.media_max_upload_bytes:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+                if extension is None:
+                    head += chunk[: 12 - len(head)]
+                    if len(head) == 12:
+                        extension = image_extension(head)
+                digest.update(chunk)
+                await file.write(chunk)
+        path = target_dir / f"{digest.hexdigest()}.{extension or image_extension(head)}"
+        await check_image(partial)
+        await anyio.to_thread.run_sync(os.replace, partial, path)
+    except BaseException:
+        await anyio.to_thread.run_sync(Path(partial).unlink, True)
+        raise
+    return path
+
+
+async def discard_upload(path: Path, in_use: Callable[[], Awaitable[bool]]) -> None:
+    """Remove a stored upload whose database update failed, unless the same content (hence the same name) is
+    referenced by another row. Cleanup errors are only logged, so the caller re-raises the original one."""
+    try:
+        if not await in_use():
+            await anyio.to_thread.run_sync(path.unlink, True)
+    except Exception:
+        logger.exception("Could not clean up %s", path.name)
+
+
+async def check_image(partial: str) -> None:
+    try:
+        await run_in_process_pool(verify_image, partial)
+    except BrokenProcessPool:  # a crashed worker says nothing about the image
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="The image is corrupt or truncated"
+        ) from None
+
+
+def variant_urls(directory: str, image_file: str | None) -> dict[str, str]:
+    """URLs of the variants generated for an image under MEDIA_ROOT/directory. Only uploads stored under
+    content-hash names have variants, and only once the background job has written them: none while it
+    runs or after it failed."""
+    if not image_file or not CONTENT_HASH_NAME.match(image_file):
+        return {}
+    urls = {}
+    for variant in VARIANTS:
+        name = f"{directory}/{variant_name(image_file, variant)}"
+        if name not in _existing_variants:
+            if not (MEDIA_ROOT / name).exists():
+                continue
+            _existing_variants.add(name)
+        urls[variant] = f"/media/{name}"
+    return urls
+
+
+def process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: forking a process that runs an event loop and thread pools isn't safe.
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.media_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+async def run_in_process_pool(func: Callable, *args):
+    global _process_pool
+    pool = process_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory on a huge image); start a fresh pool for the next call.
+        if _process_pool is pool:
+            _process_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+async def generate_variants_in_background(path: Path, *tags: str) -> None:
+    """Generate the image's variants, then invalidate the cached responses tagged `tags`, which were built
+    before the variants existed."""
+    try:
+        created = await run_in_process_pool(generate_variants, str(path), str(STAGING_ROOT))
+    except BrokenProcessPool:
+        logger.exception("Image worker crashed on %s", path.name)
+        return
+    except Exception:
+        logger.exception("Could not generate image variants for %s", path.name)
+        return
+    if created:
+        await response_cache.invalidate(*tags)
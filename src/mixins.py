@@ -10,11 +10,17 @@ class AuthorRelationMixin:
     _author_id_unique: bool = False
     _author_back_populate: str | None = None
     _author_id_nullable: bool = False
+    _author_id_index: bool = True  # off when a composite index leading with author_id is declared instead
 
     # Don't use classmethod for user_id and user attributes
     @declared_attr
     def author_id(cls) -> Mapped[int]:
-        return mapped_column(ForeignKey("authors.id"), unique=cls._author_id_unique, nullable=cls._author_id_nullable)
+        return mapped_column(
+            ForeignKey("authors.id"),
+            unique=cls._author_id_unique,
+            nullable=cls._author_id_nullable,
+            index=cls._author_id_index and not cls._author_id_unique,  # a unique constraint provides one
+        )
 
     @declared_attr
     def author(cls) -> Mapped["Author"]:
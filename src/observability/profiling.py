@@ -0,0 +1,111 @@
+import hmac
+import itertools
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # optional: pip install "fast-library[profiling]"
+    Profiler = None
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+@dataclass
+class RequestProfile:
+    id: int
+    method: str
+    path: str
+    status_code: int
+    duration: float
+    started_at: float
+    speedscope: str = field(repr=False)
+
+
+class ProfileStore:
+    """The most recent request profiles, oldest dropped first."""
+
+    def __init__(self, size: int) -> None:
+        self.profiles: deque[RequestProfile] = deque(maxlen=size)
+        self.ids = itertools.count(1)
+
+    def add(self, profile: RequestProfile) -> None:
+        self.profiles.append(profile)
+
+    def get(self, profile_id: int) -> RequestProfile | None:
+        return next((profile for profile in self.profiles if profile.id == profile_id), None)
+
+
+profile_store = ProfileStore(size=50)
+
+
+class ProfilerMiddleware:
+    """Profile a request with pyinstrument when it carries `X-Profile: <token>` or is picked by
+    `sample_rate`, and keep its speedscope output in `store`. Only installed when profiling is enabled,
+    so requests pay nothing otherwise; at most `max_concurrent` requests are profiled at a time."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str | None,
+        sample_rate: float = 0.0,
+        interval: float = 0.001,
+        max_concurrent: int = 1,
+        store: ProfileStore = profile_store,
+    ) -> None:
+        if Profiler is None:
+            raise RuntimeError("profiling is enabled but pyinstrument is not installed")
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_concurrent = max_concurrent
+        self.store = store
+        self.active = 0
+
+    def wants_profile(self, scope: Scope) -> bool:
+        if self.active >= self.max_concurrent:
+            return False
+        header = Headers(scope=scope).get(PROFILE_HEADER)
+        if header is not None and self.token and hmac.compare_digest(header.encode(), self.token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = next(self.store.ids)
+        status_code = 500
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = str(profile_id)
+            await send(message)
+
+        self.active += 1
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        started_at = time.time()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session = profiler.stop()
+            self.active -= 1
+        speedscope = await anyio.to_thread.run_sync(SpeedscopeRenderer().render, session)
+        self.store.add(
+            RequestProfile(
+                profile_id, scope["method"], scope["path"], status_code, session.duration, started_at, speedscope
+            )
+        )
@@ -0,0 +1,118 @@
+import logging
+import time
+from collections import Counter
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import Connection, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+_START_TIMES_KEY = "query_start_times"
+
+# Called with (connection, statement, parameters, elapsed seconds) after every statement on an
+# instrumented engine.
+QueryObserver = Callable[[Connection, str, object, float], None]
+query_observers: list[QueryObserver] = []
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    rows: int = 0
+    db_time: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    # The request's ASGI scope; routing adds the matched route to it.
+    scope: Scope = field(default_factory=dict, repr=False)
+
+    def server_timing(self, total: float) -> str:
+        return (
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.statements} queries, {self.rows} rows", '
+            f"app;dur={total * 1000:.1f}"
+        )
+
+
+# Set per request by QueryStatsMiddleware; SQLAlchemy runs the cursor events in a greenlet that shares
+# the request task's context, so the engine listeners below see the same object.
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info[_START_TIMES_KEY].pop()
+    for observer in query_observers:
+        observer(conn, statement, parameters, elapsed)
+    stats = current_query_stats.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.rows += max(cursor.rowcount, 0)
+    stats.db_time += elapsed
+    # Statements are already parameterized, so the SQL text is the statement shape.
+    stats.shapes[statement] += 1
+
+
+def _handle_error(exception_context) -> None:
+    start_times = exception_context.connection.info.get(_START_TIMES_KEY) if exception_context.connection else None
+    if start_times:
+        start_times.pop()
+
+
+def add_query_observer(observer: QueryObserver) -> None:
+    query_observers.append(observer)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """Count statements, rows and DB time per request, report them in a Server-Timing header and warn
+    when one statement shape repeats more than `n_plus_one_threshold` times."""
+
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 10) -> None:
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope=scope)
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            current_query_stats.reset(token)
+            self.check_n_plus_one(scope, stats)
+
+    def check_n_plus_one(self, scope: Scope, stats: QueryStats) -> None:
+        route = scope.get("route")
+        path = getattr(route, "path", scope["path"])
+        for statement, count in stats.shapes.items():
+            if count > self.n_plus_one_threshold:
+                logger.warning(
+                    "Possible N+1 in %s %s: statement executed %d times: %s",
+                    scope["method"],
+                    path,
+                    count,
+                    " ".join(statement.split())[:300],
+                )
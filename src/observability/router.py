@@ -0,0 +1,53 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import PlainTextResponse
+
+from src.authors.crud import get_current_superuser
+from src.observability.metrics import registry
+from src.observability.profiling import profile_store
+from src.observability.slow_queries import slow_query_log
+
+router = APIRouter(tags=["observability"])
+admin_router = APIRouter(prefix="/admin", tags=["observability"], dependencies=[Depends(get_current_superuser)])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@admin_router.get("/profiles/")
+async def list_profiles() -> list[dict]:
+    return [
+        {
+            "id": profile.id,
+            "method": profile.method,
+            "path": profile.path,
+            "status_code": profile.status_code,
+            "duration": profile.duration,
+            "started_at": profile.started_at,
+        }
+        for profile in reversed(profile_store.profiles)
+    ]
+
+
+@admin_router.get("/profiles/{profile_id}/", response_class=Response)
+async def get_profile(profile_id: int) -> Response:
+    """Speedscope JSON: open it at https://www.speedscope.app."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return Response(
+        profile.speedscope,
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'},
+    )
+
+
+@admin_router.get("/slow-queries/")
+async def list_slow_queries() -> list[dict]:
+    return [asdict(entry) for entry in reversed(slow_query_log.entries)]
+
+
+router.include_router(admin_router)
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from sqlalchemy import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import settings
+from src.observability.metrics import route_label
+from src.observability.queries import current_query_stats
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists get one placeholder per element; collapse them so they share a normalized shape.
+IN_LIST = re.compile(r"IN \((?:%(?:\([^)]+\))?s(?:, )?)+\)")
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameter_types: dict[str, str] | list[str]
+    duration: float
+    route: str
+    recorded_at: float = field(default_factory=time.time)
+    # EXPLAIN (FORMAT JSON) output, filled in shortly after the entry is recorded for sampled queries.
+    plan: dict | None = None
+
+
+def normalize(statement: str) -> str:
+    return IN_LIST.sub("IN (...)", " ".join(statement.split()))
+
+
+def parameter_types(parameters) -> dict[str, str] | list[str]:
+    if isinstance(parameters, list):  # executemany: every row has the same types
+        parameters = parameters[0] if parameters else {}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+class SlowQueryLog:
+    """Query observer keeping statements slower than `threshold` seconds in a ring buffer.
+
+    A random `explain_rate` share of them get their plan captured with a plain EXPLAIN (the statement is
+    not executed again) on a separate pooled connection, in a task so the request doesn't wait for it."""
+
+    def __init__(self, threshold: float, explain_rate: float, size: int, max_concurrent_explains: int = 2) -> None:
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.entries: deque[SlowQuery] = deque(maxlen=size)
+        self.max_concurrent_explains = max_concurrent_explains
+        self.explains: set[asyncio.Task] = set()
+
+    def __call__(self, conn: Connection, statement: str, parameters, elapsed: float) -> None:
+        if elapsed < self.threshold or statement.startswith("EXPLAIN"):
+            return
+        stats = current_query_stats.get()
+        entry = SlowQuery(
+            normalize(statement),
+            parameter_types(parameters),
+            elapsed,
+            route_label(stats.scope) if stats is not None else "<background>",
+        )
+        self.entries.append(entry)
+        logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, entry.route, entry.statement[:300])
+        if (
+            self.explain_rate > 0
+            and random.random() < self.explain_rate
+            and len(self.explains) < self.max_concurrent_explains
+            and entry.statement.lstrip().upper().startswith(EXPLAINABLE)
+        ):
+            # Cursor events run in SQLAlchemy's greenlet on the event loop thread.
+            task = asyncio.get_running_loop().create_task(self.explain(conn.engine, entry, statement, parameters))
+            self.explains.add(task)
+            task.add_done_callback(self.explains.discard)
+
+    async def explain(self, sync_engine, entry: SlowQuery, statement: str, parameters) -> None:
+        if isinstance(parameters, list):
+            parameters = parameters[0] if parameters else {}
+        try:
+            async with AsyncEngine(sync_engine).connect() as conn:
+                await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {max(int(self.threshold * 10_000), 1000)}")
+                result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                plan = result.scalar_one()
+                await conn.rollback()
+        except Exception:
+            logger.exception("Could not EXPLAIN slow query: %s", entry.statement[:300])
+            return
+        entry.plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+
+
+slow_query_log = SlowQueryLog(
+    settings.slow_query_threshold, settings.slow_query_explain_rate, settings.slow_query_log_size
+)
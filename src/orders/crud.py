@@ -1,13 +1,21 @@
 from fastapi import HTTPException, status
-from sqlalchemy import select, Result
+from sqlalchemy import select, update, Result
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
+from src.authors.models import Author
+from src.books.crud import record_co_occurrences
 from src.books.models import Book
 from src.orders.models import Order
 from src.orders.models import BookOrder
 from src.orders.schemas import OrderCreate
+from src.database import release_connection
 
 
+async def change_order_count(db: AsyncSession, author_id: int, delta: int) -> None:
+    await db.execute(update(Author).where(Author.id == author_id).values(order_count=Author.order_count + delta))
+
+
+@release_connection
 async def get_orders(db: AsyncSession) -> list[Order]:
     stmt: Result = await db.execute(
         select(Order).options(
@@ -29,6 +37,9 @@ async def add_order(db: AsyncSession, order_in: OrderCreate) -> Order:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="One or more books not found")
     for item in order_in.books:
         order.books.append(BookOrder(book=books_map[item.book_id], quantity=item.quantity))
+    await db.flush()
+    await record_co_occurrences(db, order.id)
+    await change_order_count(db, order_in.author_id, 1)
     await db.commit()
     result = (
         select(Order)
@@ -49,5 +60,6 @@ async def delete_order(db: AsyncSession, order_id: int) -> None:
     order = result.scalar_one_or_none()
     if order is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    await change_order_count(db, order.author_id, -1)
     await db.delete(order)
     await db.commit()
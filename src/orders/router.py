@@ -1,18 +1,23 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dependencies import get_db
+from src.deadlines import DeadlineRoute
+from src.dependencies import get_db, get_read_db
 from src.orders import crud
 from src.orders.schemas import Order, OrderCreate
+from src.responses import model_response
 
-router = APIRouter(prefix="/orders", tags=["orders"])
+router = APIRouter(prefix="/orders", tags=["orders"], route_class=DeadlineRoute)
+
+orders_adapter = TypeAdapter(list[Order])
 
 
 @router.get("/", response_model=list[Order])
-async def get_orders(db: Annotated[AsyncSession, Depends(get_db)]):
-    return await crud.get_orders(db=db)
+async def get_orders(db: Annotated[AsyncSession, Depends(get_read_db)]):
+    return model_response(orders_adapter, await crud.get_orders(db=db))
 
 
 @router.post("/", response_model=Order, status_code=status.HTTP_201_CREATED)
@@ -25,7 +25,8 @@ class BookOrder(BaseModel):
 
 class OrderCreate(OrderBase):
     author_id: int
-    books: list[OrderBookIn]
+    # add_order records a book_relations pair for every two books, so the work grows with the square of this.
+    books: list[OrderBookIn] = Field(max_length=100)
 
 
 class Order(BaseModel):
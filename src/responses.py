@@ -0,0 +1,17 @@
+from typing import Any
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+class ModelResponse(Response):
+    media_type = "application/json"
+
+
+def model_response(adapter: TypeAdapter, content: Any, status_code: int = status.HTTP_200_OK) -> ModelResponse:
+    """Validate ORM objects and encode them to JSON bytes in one pydantic-core pass.
+
+    Returning a Response makes FastAPI skip its own response_model validation, the intermediate
+    dicts and the JSON encoding; keep response_model on the route for the OpenAPI schema."""
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+    return ModelResponse(body, status_code=status_code)
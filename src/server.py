@@ -0,0 +1,59 @@
+"""Production entry point: `fast-library` (or `python -m src.server`).
+
+Runs src.main:app under uvicorn with one worker process per available CPU, unless server_workers or
+--workers says otherwise. Without the Redis response cache (response_cache_redis_url) each worker caches
+responses in its own memory, where other workers' writes can't invalidate them: a worker may serve a book or
+the genre/tag lists up to response_cache_memory_ttl seconds stale, and the server warns about it at start.
+
+Every worker runs the app lifespan, which warms its own connection pool and caches before the worker starts
+accepting connections (pools can't be shared across processes, so warming the parent before forking would
+not help) and disposes its engines on shutdown. The periodic maintenance jobs are scheduled in every worker
+but run in one of them at a time (see run_periodically).
+"""
+
+import argparse
+import logging
+import os
+
+import uvicorn
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):  # respects CPU pinning and container cpusets
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument("--workers", type=int, default=settings.server_workers or available_cpus())
+    args = parser.parse_args()
+    if args.workers > 1 and not settings.response_cache_redis_url:
+        logger.warning(
+            "Running %d workers without response_cache_redis_url: each caches responses in memory, and another "
+            "worker's writes leave them stale for up to %g seconds",
+            args.workers,
+            settings.response_cache_memory_ttl,
+        )
+
+    uvicorn.run(
+        "src.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=settings.server_forwarded_allow_ips,
+        timeout_keep_alive=settings.server_keep_alive,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import Callable, Hashable
+from functools import wraps
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.observability.metrics import registry
+
+single_flight_calls = registry.counter(
+    "single_flight_calls_total", "Calls to coalesced reads, by whether they ran the query.", ("function", "role")
+)
+
+
+class LeaderCancelled(Exception):
+    """The call followers were waiting on was cancelled; they retry on their own."""
+
+
+def session_key(*args, **kwargs) -> Hashable:
+    # Sessions differ per request, but the engine behind them decides what a read can see: a caller on the
+    # primary (read-your-writes) must not get a result a replica produced, and vice versa.
+    def part(value):
+        return ("engine", id(value.bind)) if isinstance(value, AsyncSession) else value
+
+    return tuple(map(part, args)), tuple((name, part(value)) for name, value in sorted(kwargs.items()))
+
+
+def single_flight(key: Callable[..., Hashable] = session_key):
+    """Let concurrent calls with the same key share one in-flight call of the wrapped coroutine.
+
+    The first caller runs it; later callers await its result or exception instead of issuing the same query.
+    Followers get the leader's ORM objects, so only wrap reads whose results are serialized, not mutated.
+    If the leader is cancelled (its client went away), waiting followers start a new call."""
+
+    def decorator(func):
+        in_flight: dict[Hashable, asyncio.Future] = {}
+        name = func.__qualname__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs)
+            while (future := in_flight.get(call_key)) is not None:
+                try:
+                    result = await asyncio.shield(future)
+                except LeaderCancelled:
+                    continue
+                single_flight_calls.inc(name, "follower")
+                return result
+
+            future = asyncio.get_running_loop().create_future()
+            in_flight[call_key] = future
+            single_flight_calls.inc(name, "leader")
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as exc:
+                future.set_exception(exc)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                del in_flight[call_key]
+                if not future.done():
+                    future.set_exception(LeaderCancelled())
+                future.exception()  # mark retrieved: no "never retrieved" warning when nobody was waiting
+
+        return wrapper
+
+    return decorator
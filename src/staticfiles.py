@@ -0,0 +1,75 @@
+import errno
+import re
+import stat
+from mimetypes import guess_type
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from src.compression import accepted_encodings, is_accepted, is_compressible
+
+# Content-hash names given by save_upload (<sha256>.png) and their variants and precompressed siblings
+# (<sha256>.thumbnail.jpg, <sha256>.webp.br): their content never changes under the same URL. Nothing else
+# qualifies, however hex-like (2024.png, deadbeef.css).
+HASHED_NAME = re.compile(r"(?:^|/)[0-9a-f]{64}\.[^/]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Served instead of the file itself when the client accepts the encoding, in preference order.
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with a cache policy and precompressed siblings.
+
+    Content-hashed names are cached for a year as immutable; anything else for `max_age` seconds, after
+    which clients revalidate with the ETag/Last-Modified StaticFiles already sends. For compressible types,
+    `name.br` or `name.gz` next to `name` is served with a Content-Encoding when the client accepts it.
+    Range requests and the pathsend extension (zero-copy sends on servers that offer it) are handled by
+    FileResponse itself; ranges always get the identity file."""
+
+    def __init__(self, *args, max_age: int = 3600, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await self.precompressed_response(path, scope) or await super().get_response(path, scope)
+        if response.status_code in (200, 206, 304):
+            response.headers["Cache-Control"] = (
+                IMMUTABLE if HASHED_NAME.search(path) else f"public, max-age={self.max_age}"
+            )
+        return response
+
+    async def precompressed_response(self, path: str, scope: Scope) -> Response | None:
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(path)[0]
+        if (
+            scope["method"] not in ("GET", "HEAD")
+            or "range" in request_headers
+            or media_type is None
+            or not is_compressible(media_type)
+        ):
+            return None
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in PRECOMPRESSED:
+            if not is_accepted(accepted, encoding):
+                continue
+            try:
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            except OSError as exc:
+                if exc.errno == errno.ENAMETOOLONG:
+                    return None
+                raise
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                response = FileResponse(
+                    full_path,
+                    stat_result=stat_result,
+                    media_type=media_type,
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+                )
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+        return None
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.books import models
+from src.books.crud import GENRES_STMT, TAGS_STMT, book_with_relations_stmt
+from src.books.routers.genres import get_genres
+from src.books.routers.tags import get_tags
+from src.config import settings
+from src.database import AsyncSessionLocal, all_engines
+
+logger = logging.getLogger(__name__)
+
+
+async def run_hot_queries(db: AsyncSession, book_id: int | None) -> None:
+    # The first execution fills SQLAlchemy's compiled cache; psycopg prepares a statement server-side once
+    # it has run prepare_threshold times on a connection, so repeat until it is prepared.
+    for _ in range((settings.DB_PREPARE_THRESHOLD or 0) + 1):
+        (await db.execute(GENRES_STMT)).scalars().all()
+        (await db.execute(TAGS_STMT)).scalars().all()
+        if book_id is not None:
+            (await db.execute(book_with_relations_stmt(book_id))).scalars().all()
+
+
+async def warm_engine(engine: AsyncEngine) -> int:
+    """Open the pool's connections concurrently, so they all get created now rather than by the first
+    requests, and run the hot queries on each of them. Returns the number of connections warmed."""
+    size = getattr(engine.sync_engine.pool, "size", lambda: 1)()
+    async with engine.connect() as conn:
+        book_id = await conn.scalar(select(models.Book.id).order_by(models.Book.id).limit(1))
+
+    async def warm_connection() -> None:
+        async with engine.connect() as conn:
+            async with AsyncSession(bind=conn, expire_on_commit=False) as db:
+                await run_hot_queries(db, book_id)
+
+    await asyncio.gather(*(warm_connection() for _ in range(size)))
+    return size
+
+
+async def prime_reference_caches() -> None:
+    async with AsyncSessionLocal() as db:
+        await get_genres(db)
+        await get_tags(db)
+
+
+async def warm_up() -> None:
+    """Run in the lifespan, so each worker is warm before it accepts its first request. A database that
+    is unreachable only costs the warmup: the worker still starts, like it would without one."""
+    started = time.perf_counter()
+    try:
+        connections = await asyncio.gather(*(warm_engine(engine) for engine in all_engines().values()))
+        await prime_reference_caches()
+    except (SQLAlchemyError, OSError):
+        logger.exception("Startup warmup failed; serving cold")
+        return
+    logger.info("Warmed %d connections and reference caches in %.2fs", sum(connections), time.perf_counter() - started)
+
+
+async def dispose_engines() -> None:
+    await asyncio.gather(*(engine.dispose() for engine in all_engines().values()))
@@ -0,0 +1,110 @@
+"""The app against an in-memory SQLite database, through FastAPI's TestClient.
+
+Each test gets a fresh schema and response cache. The lifespan doesn't run (the client isn't entered), so
+there is no warmup and no periodic jobs.
+"""
+
+import asyncio
+import os
+
+# Settings are read at import time; nothing connects to this database.
+for name, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "fast_library_test",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "ECHO": "false",
+    "SECRET_KEY": "test-secret-key",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from starlette.testclient import TestClient  # noqa: E402
+
+from src.config import BASE_DIR, settings  # noqa: E402
+
+for directory in ("media", "static"):  # mounted by src.main at import
+    (BASE_DIR / directory).mkdir(exist_ok=True)
+
+from src.cache import MemoryBackend, response_cache  # noqa: E402
+from src.deadlines import set_statement_timeout  # noqa: E402
+from src.dependencies import get_db, get_read_db  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models import Base  # noqa: E402
+
+# SQLite has no statement_timeout.
+event.remove(Session, "after_begin", set_statement_timeout)
+
+
+async def create_schema(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # StaticPool: every session shares the one connection that holds the in-memory database.
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(create_schema(engine))
+
+    async def get_test_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_read_db] = get_test_db
+    monkeypatch.setattr(
+        response_cache,
+        "backend",
+        MemoryBackend(settings.response_cache_max_bytes, settings.response_cache_memory_ttl),
+    )
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def create_genre(client):
+    def create(name: str) -> int:
+        response = client.post("/genres/", json={"name": name})
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    return create
+
+
+@pytest.fixture
+def create_author(client):
+    def create(username: str) -> int:
+        response = client.post(
+            "/authors/", json={"username": username, "email": f"{username}@example.com", "password": "password123"}
+        )
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    return create
+
+
+@pytest.fixture
+def create_book(client):
+    def create(title: str, genre_id: int, author_id: int, published: str = "2020-01-01T00:00:00") -> int:
+        response = client.post(
+            "/books/",
+            json={
+                "title": title,
+                "rating": 3,
+                "date_published": published,
+                "genre_id": genre_id,
+                "author_id": author_id,
+            },
+        )
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    return create
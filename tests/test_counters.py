@@ -0,0 +1,138 @@
+"""The denormalized counters (genre book_count, tag usage_count, author book/order counts) move with every
+write that changes what they count, and GET /tags/popular/ is served from them."""
+
+import pytest
+
+
+def create_tag(client, name: str) -> int:
+    response = client.post("/tags/", json={"name": name})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def attach(client, book_id: int, tag_id: int) -> None:
+    response = client.put(f"/books/{book_id}/tags/{tag_id}/")
+    assert response.status_code == 200, response.text
+
+
+def genre_book_count(client, genre_id: int) -> int:
+    return client.get(f"/genres/genres/{genre_id}/with_books/").json()["book_count"]
+
+
+def popular_tags(client, limit: int = 20) -> list[tuple[str, int]]:
+    response = client.get("/tags/popular/", params={"limit": limit})
+    assert response.status_code == 200, response.text
+    return [(tag["name"], tag["usage_count"]) for tag in response.json()]
+
+
+def author_stats(client) -> dict[str, tuple[int, int, str | None]]:
+    response = client.get("/authors/", params={"include_stats": True})
+    return {
+        author["username"]: (author["book_count"], author["order_count"], author["last_published"])
+        for author in response.json()
+    }
+
+
+@pytest.fixture
+def library(client, create_genre, create_author, create_book):
+    """Two genres and two authors; three books with tags: b1 (fiction, ann: red, blue), b2 (fiction, bob:
+    red) and b3 (poetry, ann: red)."""
+    ids = {"fiction": create_genre("fiction"), "poetry": create_genre("poetry")}
+    ids["ann"] = create_author("ann")
+    ids["bob"] = create_author("bob")
+    ids["b1"] = create_book("b1", ids["fiction"], ids["ann"], "2021-01-01T00:00:00")
+    ids["b2"] = create_book("b2", ids["fiction"], ids["bob"], "2020-01-01T00:00:00")
+    ids["b3"] = create_book("b3", ids["poetry"], ids["ann"], "2019-01-01T00:00:00")
+    ids["red"] = create_tag(client, "red")
+    ids["blue"] = create_tag(client, "blue")
+    ids["green"] = create_tag(client, "green")
+    for book in ("b1", "b2", "b3"):
+        attach(client, ids[book], ids["red"])
+    attach(client, ids["b1"], ids["blue"])
+    return ids
+
+
+def test_create_counts_books(client, library):
+    assert genre_book_count(client, library["fiction"]) == 2
+    assert genre_book_count(client, library["poetry"]) == 1
+    assert author_stats(client) == {"ann": (2, 0, "2021-01-01T00:00:00"), "bob": (1, 0, "2020-01-01T00:00:00")}
+
+
+def test_popular_tags_come_by_usage(client, library):
+    # green is on no book, so it isn't listed.
+    assert popular_tags(client) == [("red", 3), ("blue", 1)]
+    assert popular_tags(client, limit=1) == [("red", 3)]
+    assert client.get("/tags/popular/", params={"limit": 0}).status_code == 422
+
+
+def test_attach_counts_tag_usage(client, library):
+    attach(client, library["b2"], library["green"])
+    attach(client, library["b3"], library["green"])
+
+    assert popular_tags(client) == [("red", 3), ("green", 2), ("blue", 1)]
+
+
+def test_attaching_twice_counts_once(client, library):
+    response = client.put(f"/books/{library['b1']}/tags/{library['blue']}/")
+
+    assert response.status_code == 409
+    assert popular_tags(client) == [("red", 3), ("blue", 1)]
+
+
+def test_detach_uncounts_tag_usage(client, library):
+    response = client.delete(f"/books/{library['b1']}/tags/{library['red']}/")
+
+    assert response.status_code == 204
+    assert popular_tags(client) == [("red", 2), ("blue", 1)]
+    assert "red" not in [tag["name"] for tag in client.get(f"/books/{library['b1']}/").json()["tags"]]
+
+
+def test_detach_last_use_drops_tag_from_popular(client, library):
+    assert client.delete(f"/books/{library['b1']}/tags/{library['blue']}/").status_code == 204
+
+    assert popular_tags(client) == [("red", 3)]
+
+
+def test_detach_unattached_tag_is_404(client, library):
+    response = client.delete(f"/books/{library['b2']}/tags/{library['blue']}/")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Tag is not attached to this book"
+    assert popular_tags(client) == [("red", 3), ("blue", 1)]
+
+
+def test_book_delete_uncounts_genre_tags_and_author(client, library):
+    assert client.delete(f"/books/{library['b1']}/").status_code == 204
+
+    assert genre_book_count(client, library["fiction"]) == 1
+    assert popular_tags(client) == [("red", 2)]
+    # ann's latest book is gone, so last_published falls back to her next one.
+    assert author_stats(client)["ann"] == (1, 0, "2019-01-01T00:00:00")
+
+
+def test_book_update_moves_genre_and_author_counts(client, library):
+    response = client.patch(
+        f"/books/{library['b1']}/", json={"genre_id": library["poetry"], "author_id": library["bob"]}
+    )
+
+    assert response.status_code == 200, response.text
+    assert genre_book_count(client, library["fiction"]) == 1
+    assert genre_book_count(client, library["poetry"]) == 2
+    assert author_stats(client) == {"ann": (1, 0, "2019-01-01T00:00:00"), "bob": (2, 0, "2021-01-01T00:00:00")}
+
+
+def test_genre_delete_uncounts_tags_and_authors(client, library):
+    assert client.delete(f"/genres/{library['fiction']}/").status_code == 204
+
+    assert genre_book_count(client, library["poetry"]) == 1
+    assert popular_tags(client) == [("red", 1)]
+    assert author_stats(client) == {"ann": (1, 0, "2019-01-01T00:00:00"), "bob": (0, 0, None)}
+
+
+def test_author_delete_uncounts_genres_and_tags(client, library):
+    assert client.delete(f"/authors/{library['ann']}/").status_code == 204
+
+    assert genre_book_count(client, library["fiction"]) == 1
+    assert client.get(f"/genres/genres/{library['poetry']}/with_books/").json()["books"] == []
+    assert genre_book_count(client, library["poetry"]) == 0
+    assert popular_tags(client) == [("red", 1)]
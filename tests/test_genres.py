@@ -0,0 +1,18 @@
+"""GET /genres/genres/{id}/with_books/ pages through a genre's books in the requested order."""
+
+
+def titles(client, genre_id: int, **params) -> list[str]:
+    response = client.get(f"/genres/genres/{genre_id}/with_books/", params=params)
+    assert response.status_code == 200, response.text
+    return [book["title"] for book in response.json()["books"]]
+
+
+def test_ties_follow_the_sort_direction(client, create_genre, create_author, create_book):
+    genre_id = create_genre("fiction")
+    author_id = create_author("ann")
+    for title, published in (("a", "2020-01-01T00:00:00"), ("b", "2020-01-01T00:00:00"), ("c", "2021-01-01T00:00:00")):
+        create_book(title, genre_id, author_id, published)
+
+    assert titles(client, genre_id, sort="-date_published") == ["c", "b", "a"]
+    assert titles(client, genre_id, sort="date_published") == ["a", "b", "c"]
+    assert titles(client, genre_id, sort="-date_published", limit=1, offset=1) == ["b"]
@@ -0,0 +1,17 @@
+"""Importing the app stays within a startup budget (benchmarks/import_time.py breaks a regression down)."""
+
+import statistics
+
+from benchmarks.import_time import import_times
+
+BUDGET_SECONDS = 2.0
+
+
+def test_app_imports_within_budget():
+    # Median of fresh interpreters, so one slow process start doesn't fail the suite.
+    totals = [
+        next(cumulative for name, _, cumulative in import_times("src.main") if name == "src.main") / 1_000_000
+        for _ in range(3)
+    ]
+
+    assert statistics.median(totals) <= BUDGET_SECONDS, f"import src.main took {totals} seconds"
@@ -0,0 +1,52 @@
+"""add_order counts "customers also ordered" pairs, and GET /books/{id}/related/ serves them by score."""
+
+import pytest
+
+from src.config import settings
+
+
+@pytest.fixture
+def books(create_genre, create_author, create_book):
+    genre_id = create_genre("fiction")
+    author_id = create_author("ann")
+    return author_id, [create_book(f"b{n}", genre_id, author_id) for n in range(4)]
+
+
+def order(client, author_id: int, book_ids: list[int]):
+    return client.post(
+        "/orders/", json={"author_id": author_id, "books": [{"book_id": i, "quantity": 1} for i in book_ids]}
+    )
+
+
+def related(client, book_id: int, limit: int = 10) -> list[str]:
+    response = client.get(f"/books/{book_id}/related/", params={"limit": limit})
+    assert response.status_code == 200, response.text
+    return [book["title"] for book in response.json()]
+
+
+def test_orders_count_pairs_both_ways(client, books):
+    author_id, (b0, b1, b2, b3) = books
+    for book_ids in ([b0, b1], [b0, b1, b2], [b0, b2], [b0, b1], [b3]):
+        assert order(client, author_id, book_ids).status_code == 201
+
+    assert related(client, b0) == ["b1", "b2"]
+    assert related(client, b1) == ["b0", "b2"]
+    assert related(client, b0, limit=1) == ["b1"]
+    # Ordered alone, or never ordered at all.
+    assert related(client, b3) == []
+    assert related(client, 999) == []
+
+
+def test_related_is_capped_at_top_k(client, books, monkeypatch):
+    author_id, (b0, b1, b2, b3) = books
+    assert order(client, author_id, [b0, b1, b2, b3]).status_code == 201
+    monkeypatch.setattr(settings, "book_relations_top_k", 2)
+
+    assert related(client, b0) == ["b1", "b2"]
+
+
+def test_order_size_is_capped(client, books):
+    author_id, (b0, *_) = books
+    response = client.post("/orders/", json={"author_id": author_id, "books": [{"book_id": b0, "quantity": 1}] * 101})
+
+    assert response.status_code == 422
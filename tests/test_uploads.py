@@ -0,0 +1,64 @@
+"""Image uploads are decoded before they are stored, and their variants are listed once they exist."""
+
+import io
+
+import pytest
+from PIL import Image
+
+from src.media import storage
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "MEDIA_ROOT", tmp_path / "media")
+    monkeypatch.setattr(storage, "STAGING_ROOT", tmp_path / "staging")
+    monkeypatch.setattr(storage, "_existing_variants", set())
+    yield tmp_path / "media"
+    storage.shutdown_process_pool()
+
+
+@pytest.fixture
+def book_id(create_genre, create_author, create_book):
+    return create_book("b1", create_genre("fiction"), create_author("ann"))
+
+
+def png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 400), "teal").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload(client, book_id: int, body: bytes):
+    return client.put(f"/books/{book_id}/image/", content=body, headers={"Content-Type": "image/png"})
+
+
+def test_upload_lists_variants_once_generated(client, media, book_id):
+    response = upload(client, book_id, png())
+
+    assert response.status_code == 200, response.text
+    name = response.json()["image_path"].rsplit("/", 1)[-1]
+    assert (media / "book_pics" / name).exists()
+    # The TestClient runs background tasks before returning, so the variants are there by now.
+    variants = client.get(f"/books/{book_id}/").json()["image_variants"]
+    assert set(variants) == {"thumbnail", "thumbnail_webp", "webp"}
+    assert all((media / url.removeprefix("/media/")).exists() for url in variants.values())
+
+
+def test_variants_are_listed_only_once_on_disk(media):
+    image_file = f"{'a' * 64}.png"
+    assert storage.variant_urls("book_pics", image_file) == {}
+
+    (media / "book_pics").mkdir(parents=True)
+    (media / "book_pics" / f"{'a' * 64}.thumbnail.jpg").touch()
+
+    assert storage.variant_urls("book_pics", image_file) == {"thumbnail": f"/media/book_pics/{'a' * 64}.thumbnail.jpg"}
+
+
+def test_truncated_image_is_rejected(client, media, book_id):
+    response = upload(client, book_id, png()[:-100])
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "The image is corrupt or truncated"
+    assert not list((media / "book_pics").iterdir())
+    assert not list((media.parent / "staging").iterdir())
+    assert client.get(f"/books/{book_id}/").json()["image_path"] == "/static/book_pics/default.jpg"